@@ -3,6 +3,7 @@ from flask import Flask, Response, request, Blueprint
 from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
 from config.env_config import get_env_config
+from database import ensure_indexes
 from routes.users import users_bp
 from routes.notes import notes_bp
 from routes.quizzes import quizzes_bp
@@ -11,9 +12,13 @@ from routes.backend_study import study_bp
 from routes.sessions import sessions_bp
 from routes.puzzles_pairs import puzzles_pair_bp
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from routes.crossword_puzzles import crossword_bp
+from utils.auth import is_token_revoked
+from utils.notes_utils import SpooledRequest
 
 app = Flask(__name__)
+app.request_class = SpooledRequest
 CORS(
     app,
     origins=["http://localhost:3000", "https://cognidy-frontend.vercel.app"],
@@ -25,9 +30,30 @@ env = get_env_config()
 
 app.config["JWT_SECRET_KEY"] = env.JWT_SECRET_KEY
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=15)
+app.config["MAX_CONTENT_LENGTH"] = env.MAX_UPLOAD_BYTES
+
+if env.TRUSTED_PROXY_HOPS:
+    # behind a proxy remote_addr is the proxy itself, guest and admission limits would put every caller in one bucket
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=env.TRUSTED_PROXY_HOPS, x_proto=env.TRUSTED_PROXY_HOPS)
 
 jwt = JWTManager(app)
 
+@jwt.token_in_blocklist_loader
+def check_token_version(jwt_header, jwt_payload):
+    # renamed or deleted users' old tokens stop working once the cached version expires
+    return is_token_revoked(jwt_payload)
+
+if env.ENSURE_INDEXES_ON_STARTUP:
+    try:
+        for entry in ensure_indexes():
+            if entry["created"]:
+                print(f"Created indexes on {entry['collection']}: {', '.join(entry['created'])} ({entry['seconds']}s)")
+            for failed in entry["failed"]:
+                print(f"[W] index {failed['name']} on {entry['collection']} was not created: {failed['error']}")
+    except Exception as error:
+        # missing indexes only make queries slower, the API can still serve
+        print(f"[W] failed to ensure indexes: {error}")
+
 @app.before_request
 def handle_options():
     if request.method == 'OPTIONS':
@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic import BaseModel, Field, ValidationError
 from dotenv import load_dotenv
 import os
@@ -13,6 +14,75 @@ class EnvConfig(BaseModel):
     EMAIL_USER: str = Field(..., description="Email account for sending reset links")
     EMAIL_PASS: str = Field(..., description="Email password or app password")
     FRONTEND_URL: str = Field(..., description="Frontend base URL")
+    TOKEN_VERSION_CACHE_SECONDS: int = Field(30, ge=1, description="Seconds a user's token version is cached before revoked tokens are noticed")
+    TOKEN_VERSION_CACHE_SIZE: int = Field(10000, ge=1, description="Users whose token version is cached per process")
+    MONGO_APP_NAME: str = Field("cognidy-cluster", description="appName reported to MongoDB for this process")
+    MONGO_MAX_POOL_SIZE: int = Field(50, ge=1, description="Open connections to MongoDB per process")
+    MONGO_MIN_POOL_SIZE: int = Field(0, ge=0, description="Connections to MongoDB kept open even when idle")
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = Field(60000, ge=1, description="Idle time after which a MongoDB connection is closed, unset keeps them forever")
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = Field(10000, ge=1, description="Time a request waits for a free MongoDB connection before failing")
+    MONGO_CONNECT_TIMEOUT_MS: int = Field(10000, ge=1, description="Timeout to open a MongoDB connection")
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = Field(10000, ge=1, description="Timeout to find a usable MongoDB server")
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = Field(None, ge=1, description="Timeout of a single MongoDB operation on the socket, unset waits forever")
+    MONGO_TRANSACTIONS: bool = Field(True, description="Write each stage's generated items in one transaction, falls back to a plain bulk write on servers without transactions")
+    GEMINI_TIMEOUT_SECONDS: int = Field(120, ge=1, description="Timeout of a single Gemini request")
+    GEMINI_MAX_CONNECTIONS: int = Field(20, ge=1, description="Open connections to Gemini per process")
+    GEMINI_MAX_KEEPALIVE_CONNECTIONS: int = Field(10, ge=0, description="Idle connections to Gemini kept open per process")
+    GEMINI_KEEPALIVE_SECONDS: int = Field(60, ge=1, description="Seconds an idle Gemini connection is kept open")
+    GEMINI_MAX_ATTEMPTS: int = Field(4, ge=1, description="Attempts per Gemini call on 429, 5xx and network errors")
+    GEMINI_BACKOFF_INITIAL_SECONDS: float = Field(1, ge=0, description="First retry delay, doubled on every attempt plus jitter")
+    GEMINI_BACKOFF_MAX_SECONDS: float = Field(20, ge=0, description="Longest delay between retries")
+    GEMINI_BREAKER_THRESHOLD: int = Field(5, ge=1, description="Consecutive failed Gemini calls that open the circuit")
+    GEMINI_BREAKER_RESET_SECONDS: int = Field(30, ge=1, description="Seconds the circuit stays open before a trial call")
+    MAX_UPLOAD_BYTES: int = Field(5 * 1024 * 1024, ge=1, description="Largest accepted request body")
+    UPLOAD_SPOOL_MEMORY_BYTES: int = Field(512 * 1024, ge=0, description="Upload bytes kept in memory before spilling to disk")
+    LOCAL_TEXT_EXTRACTION: bool = Field(True, description="Send extracted note text to Gemini instead of uploading the file")
+    NOTE_TOKEN_BUDGET: int = Field(30000, ge=1000, description="Estimated tokens of note text sent with each prompt")
+    INGEST_WORKERS: int = Field(2, ge=1, description="Threads uploading notes to Gemini")
+    GOALS_WORKERS: int = Field(2, ge=1, description="Threads generating roadmap goals")
+    PUZZLES_WORKERS: int = Field(2, ge=1, description="Threads generating puzzle pairs")
+    QUIZZES_WORKERS: int = Field(2, ge=1, description="Threads generating quizzes")
+    COMBINED_WORKERS: int = Field(2, ge=1, description="Threads running combined generation")
+    GENERATION_COMBINED: bool = Field(False, description="Generate goals, quizzes and puzzles with a single model call")
+    GENERATION_QUEUE_SIZE: int = Field(20, ge=0, description="Jobs each generation stage may queue before rejecting")
+    GUEST_WORKERS: int = Field(2, ge=1, description="Threads generating content for guest uploads")
+    GUEST_QUEUE_SIZE: int = Field(4, ge=0, description="Guest uploads waiting for a thread before rejecting")
+    GUEST_DEADLINE_SECONDS: int = Field(60, ge=1, description="Seconds a guest upload waits for its content")
+    GUEST_UPLOADS_BURST: int = Field(3, ge=1, description="Guest uploads allowed at once per IP")
+    GUEST_UPLOAD_REFILL_SECONDS: int = Field(120, ge=1, description="Seconds for an IP to earn another guest upload")
+    GUEST_CACHE_SIZE: int = Field(200, ge=1, description="Guest results kept in memory by file hash")
+    GUEST_CACHE_TTL_SECONDS: int = Field(900, ge=1, description="Seconds a guest result is kept in memory")
+    ADMISSION_USER_CONCURRENCY: int = Field(2, ge=1, description="Generation requests a caller may have in progress")
+    ADMISSION_GLOBAL_CONCURRENCY: int = Field(20, ge=1, description="Generation requests in progress across all workers")
+    ADMISSION_RATE_LIMIT: int = Field(10, ge=1, description="Generation requests a caller may make per window")
+    ADMISSION_RATE_WINDOW_SECONDS: int = Field(60, ge=1, description="Sliding window of ADMISSION_RATE_LIMIT")
+    AI_CARD_CACHE_ENTRIES: int = Field(1000, ge=1, description="Topics kept in the ai-card cache")
+    AI_CARD_CACHE_BYTES: int = Field(5 * 1024 * 1024, ge=1, description="JSON bytes kept in the ai-card cache")
+    AI_CARD_CACHE_TTL_SECONDS: int = Field(24 * 3600, ge=1, description="Seconds a cached ai-card topic is served")
+    GENERATION_BACKEND: Literal["local", "queue"] = Field("local", description="Run generation in the web process or through the jobs collection")
+    GENERATION_CACHE_TTL_SECONDS: int = Field(7 * 24 * 3600, ge=60, description="Seconds a cached generation is served")
+    GENERATION_CACHE_MAX_ENTRIES: int = Field(5000, ge=1, description="Cached generations kept before evicting the least recently used")
+    GENERATION_CACHE_MAX_BYTES: int = Field(256 * 1024 * 1024, ge=1024 * 1024, description="JSON bytes of cached generations kept before evicting the least recently used")
+    JOB_LEASE_SECONDS: int = Field(120, ge=10, description="Seconds a claimed job stays leased without a heartbeat")
+    JOB_MAX_ATTEMPTS: int = Field(3, ge=1, description="Attempts before a job is marked dead")
+    JOB_RETRY_DELAY_SECONDS: int = Field(30, ge=0, description="Base delay before a failed job is retried")
+    PROMPT_CONTEXT_TOKENS: int = Field(1500, ge=100, description="Estimated tokens of previous items sent with each section prompt")
+    ENSURE_INDEXES_ON_STARTUP: bool = Field(True, description="Create missing Mongo indexes when the API starts, otherwise run python -m manage ensure-indexes")
+    GEMINI_MODE: Literal["live", "record", "replay"] = Field("live", description="live calls Gemini, record also saves every response to GEMINI_CASSETTE_DIR, replay answers from it offline")
+    GEMINI_CASSETTE_DIR: str = Field("cassettes", description="Folder of recorded Gemini responses")
+    GEMINI_FAKE_LATENCY_MS: int = Field(0, ge=0, description="Delay added to every call in record and replay mode")
+    GEMINI_FAKE_LATENCY_JITTER_MS: int = Field(0, ge=0, description="Random extra delay of up to this many ms per call")
+    GEMINI_FAKE_ERROR_RATE: float = Field(0, ge=0, le=1, description="Share of calls that fail with GEMINI_FAKE_ERROR_CODE in record and replay mode")
+    GEMINI_FAKE_ERROR_CODE: int = Field(503, ge=400, le=599, description="Status code of injected Gemini errors")
+    GEMINI_FAKE_SEED: int = Field(0, description="Seed of the injected latency and errors, so load runs are repeatable")
+    GEMINI_LEDGER_ENABLED: bool = Field(True, description="Record every Gemini call in the gemini_ledger collection")
+    GEMINI_LEDGER_BYTES: int = Field(64 * 1024 * 1024, ge=1024 * 1024, description="Size of the capped gemini_ledger collection")
+    GEMINI_LEDGER_QUEUE_SIZE: int = Field(1000, ge=10, description="Ledger entries buffered for the writer before new ones are dropped")
+    DEDUPE_ENABLED: bool = Field(True, description="Drop generated quizzes, puzzles and flashcards that nearly duplicate the user's existing ones")
+    DEDUPE_THRESHOLD: float = Field(0.7, gt=0, le=1, description="Estimated word shingle similarity from which two items are duplicates")
+    PROMPT_CONTEXT_MAX_ITEMS: int = Field(60, ge=1, description="Most recent previous items considered for the prompt context")
+    TRUSTED_PROXY_HOPS: int = Field(0, ge=0, description="Reverse proxies in front of the API whose X-Forwarded-For is trusted, 0 uses the socket address")
+    OPERATOR_USERNAMES: str = Field("", description="Comma separated usernames allowed to read the generation and ai-card stats routes, empty allows nobody")
 
 def get_env_config() -> EnvConfig:
     try:
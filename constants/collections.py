@@ -3,12 +3,18 @@ from enum import Enum
 
 class Collection(Enum):
     USERS = "users"
+    NOTES = "notes"
     FLASHCARDS = "flashcards"
     PUZZLES = "puzzles"
     ROADMAP_GOALS = "roadmap_goals"
     THESAURUS = "thesaurus"
     QUIZZES = "quizzes"
     SESSIONS = "sessions"
+    JOBS = "jobs"
+    GENERATION_CACHE = "generation_cache"
+    ADMISSION = "admission"
+    DEDUPE_INDEX = "dedupe_index"
+    GEMINI_LEDGER = "gemini_ledger"
 
     @classmethod
     def list(cls):
@@ -0,0 +1,27 @@
+from constants.puzzles_pair_prompt import get_puzzles_prompt
+from constants.quizzes_prompt import get_quizzes_prompt
+from constants.roadmap_prompt import get_roadmap_prompt
+
+
+PROMPT = """
+You will complete THREE independent tasks over the same new_file: "goals", "quizzes" and "puzzles".
+Each task below has its own rules and output format, follow each one exactly as if it was the only task.
+
+Return only ONE JSON object with the keys "goals", "quizzes" and "puzzles".
+The value of each key is the JSON array its task asks for, nothing else.
+
+{
+  "goals": [ ...output of the goals task... ],
+  "quizzes": [ ...output of the quizzes task... ],
+  "puzzles": [ ...output of the puzzles task... ]
+}
+"""
+
+def get_combined_prompt(prev_goals, prev_quizzes, prev_puzzles):
+    """Each prev_* is the (context json, total count) pair the section services build."""
+    return (
+        PROMPT
+        + "\n\n===== TASK: goals =====\n" + get_roadmap_prompt(*prev_goals)
+        + "\n\n===== TASK: quizzes =====\n" + get_quizzes_prompt(*prev_quizzes)
+        + "\n\n===== TASK: puzzles =====\n" + get_puzzles_prompt(*prev_puzzles)
+    )
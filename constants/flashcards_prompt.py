@@ -0,0 +1,15 @@
+SINGLE_CARD_PROMPT = 'Give one flashcard for the "{topic}" as a single json object with the keys "front" and "back". Return only the json object. Put the question on "front" and the answer on "back".'
+
+MULTI_CARD_PROMPT = (
+    'Give {count} flashcards for the topic "{topic}" as a JSON array. '
+    'Each element must be an object with the keys "front" and "back". '
+    'Put the question or prompt on "front" and the answer on "back". '
+    'The answer must be brief. '
+    'Return only the JSON array.'
+)
+
+def get_single_card_prompt(topic):
+    return SINGLE_CARD_PROMPT.format(topic=topic)
+
+def get_cards_prompt(topic, count):
+    return MULTI_CARD_PROMPT.format(topic=topic, count=count)
@@ -0,0 +1,45 @@
+MAX_GUEST_FLASHCARDS = 10
+MAX_GUEST_QUIZZES = 5
+
+PROMPT = f"""
+You are given:
+- new_file: a text extracted directly from an educational file (e.g., notes, syllabus, or material).
+
+---
+
+### TASK
+Generate study content that comes **only** from the actual content and terminology found in new_file:
+- 5–{MAX_GUEST_FLASHCARDS} flashcards
+- 3–{MAX_GUEST_QUIZZES} quizzes
+
+Do **not** infer or assume extra topics, frameworks, or domains not explicitly present in the file.
+
+---
+
+### FLASHCARD RULES
+- "front" is a question or term taken from the text.
+- "back" is a brief answer (max 20 words).
+- No two flashcards ask about the same idea.
+
+### QUIZ RULES
+- "question" must reference ideas, terminology, or processes explicitly present in the text.
+- "options" has 2–4 answers, only one of them is correct.
+- "correct" is the index of the correct answer in the "options" array.
+
+---
+
+### OUTPUT FORMAT
+Return only ONE JSON object, no markdown, no explanations:
+
+{{
+  "flashcards": [
+    {{ "front": "What is an array?", "back": "A fixed-size sequence of elements stored contiguously." }}
+  ],
+  "quizzes": [
+    {{ "question": "Which structure stores elements contiguously?", "options": ["Linked list", "Array", "Tree"], "correct": 1 }}
+  ]
+}}
+"""
+
+def get_guest_prompt():
+    return PROMPT
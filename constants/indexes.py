@@ -0,0 +1,58 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from constants.collections import Collection
+
+JOBS_RETENTION_SECONDS = 7 * 24 * 3600
+ADMISSION_IDLE_SECONDS = 24 * 3600
+
+# every collection has an entry, an empty list means only the default _id index is needed
+INDEXES = {
+    Collection.USERS: [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email"),
+        IndexModel([("reset_token", ASCENDING)], name="reset_token", sparse=True),
+    ],
+    Collection.NOTES: [
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+        IndexModel([("user_id", ASCENDING), ("hash", ASCENDING)], name="user_id_hash_unique", unique=True, partialFilterExpression={"hash": {"$type": "string"}}),
+    ],
+    Collection.FLASHCARDS: [
+        IndexModel([("username", ASCENDING), ("section", ASCENDING)], name="username_section"),
+        IndexModel([("note_id", ASCENDING)], name="note_id", sparse=True),
+    ],
+    Collection.PUZZLES: [
+        IndexModel([("user_id", ASCENDING), ("_id", DESCENDING)], name="user_id_recent"),
+        IndexModel([("note_id", ASCENDING)], name="note_id", sparse=True),
+    ],
+    Collection.ROADMAP_GOALS: [
+        IndexModel([("user_id", ASCENDING), ("order", ASCENDING)], name="user_id_order"),
+        IndexModel([("note_id", ASCENDING)], name="note_id", sparse=True),
+    ],
+    Collection.THESAURUS: [],
+    Collection.QUIZZES: [
+        IndexModel([("user_id", ASCENDING), ("_id", DESCENDING)], name="user_id_recent"),
+        IndexModel([("note_id", ASCENDING)], name="note_id", sparse=True),
+    ],
+    Collection.SESSIONS: [
+        IndexModel([("user_id", ASCENDING), ("section", ASCENDING)], name="user_id_section"),
+    ],
+    Collection.JOBS: [
+        IndexModel([("status", ASCENDING), ("kind", ASCENDING), ("available_at", ASCENDING)], name="claim"),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="expired_leases"),
+        IndexModel([("parent_id", ASCENDING), ("kind", ASCENDING)], name="parent_kind_unique", unique=True, partialFilterExpression={"parent_id": {"$exists": True}}),
+        IndexModel([("finished_at", ASCENDING)], name="finished_ttl", expireAfterSeconds=JOBS_RETENTION_SECONDS),
+    ],
+    Collection.GENERATION_CACHE: [
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+        IndexModel([("last_hit_at", ASCENDING)], name="last_hit_at"),
+    ],
+    Collection.ADMISSION: [
+        IndexModel([("updated_at", ASCENDING)], name="idle_ttl", expireAfterSeconds=ADMISSION_IDLE_SECONDS),
+    ],
+    Collection.DEDUPE_INDEX: [
+        IndexModel([("owner", ASCENDING), ("kind", ASCENDING), ("bands", ASCENDING)], name="owner_kind_bands"),
+        IndexModel([("kind", ASCENDING), ("item_id", ASCENDING)], name="kind_item_unique", unique=True),
+    ],
+    Collection.GEMINI_LEDGER: [
+        IndexModel([("ts", ASCENDING)], name="ts"),
+    ],
+}
@@ -3,7 +3,7 @@ from models.puzzle_pairs import MAX_PUZZLES
 
 PROMPT = """
 You are given:
-- previous_puzzles: an array of JSON objects like { "_id": string, "pairs": [{ "left": string, "right": string }] }
+- previous_puzzles: an array of JSON objects like { "_id": string, "terms": [string] }, where terms are the "left" words of its pairs, the most recent puzzles of the user
 - new_file: a text extracted directly from an educational file (e.g., notes, syllabus, or material).
 
 ---
@@ -124,5 +124,6 @@ Output:
 ]
 """
 
-def get_puzzles_prompt(prev_puzzles):
-    return f"Previous puzzles to use: {prev_puzzles}\n\n You can only generate {MAX_PUZZLES - len(prev_puzzles)} new goals, but you can merge and/or reorder the previous ones with a new one as long as the total order is not more than {MAX_PUZZLES}" + PROMPT
+def get_puzzles_prompt(prev_puzzles, prev_count):
+    """prev_puzzles is the json context of the most recent previous puzzles, prev_count is how many the user has in total."""
+    return f"Previous puzzles to use: {prev_puzzles}\n\n The user has {prev_count} puzzles. You can only generate {max(0, MAX_PUZZLES - prev_count)} new puzzles, but you can merge the previous ones with a new one as long as the total is not more than {MAX_PUZZLES}" + PROMPT
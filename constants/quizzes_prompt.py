@@ -3,7 +3,7 @@ from models.quizzes import MAX_QUIZZES
 
 PROMPT = """
 You are given:
-- previous_quizzes: an array of JSON objects like { "_id": string, "question": string, "options": [string] }
+- previous_quizzes: an array of JSON objects like { "_id": string, "question": string }, the most recent quizzes of the user
 - new_file: a text extracted directly from an educational file (e.g., notes, syllabus, or material).
 
 ---
@@ -116,5 +116,6 @@ Output:
 ]
 """
 
-def get_quizzes_prompt(prev_quizzes):
-    return f"Previous quizzes to use: {prev_quizzes}\n\n You can only generate {MAX_QUIZZES - len(prev_quizzes)} new goals, but you can merge and/or reorder the previous ones with a new one as long as the total order is not more than {MAX_QUIZZES}" + PROMPT
+def get_quizzes_prompt(prev_quizzes, prev_count):
+    """prev_quizzes is the json context of the most recent previous quizzes, prev_count is how many the user has in total."""
+    return f"Previous quizzes to use: {prev_quizzes}\n\n The user has {prev_count} quizzes. You can only generate {max(0, MAX_QUIZZES - prev_count)} new quizzes, but you can merge the previous ones with a new one as long as the total is not more than {MAX_QUIZZES}" + PROMPT
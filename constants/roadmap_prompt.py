@@ -3,7 +3,7 @@ from models.roadmap_goal import MAX_GOALS
 
 PROMPT = """
 You are given:
-- previous_goals: an array of { "_id": string, "order": number, "title": string, "completed": boolean }
+- previous_goals: an array of { "_id": string, "order": number, "title": string, "completed": boolean }, the most recent goals of the user
 - new_file: a text extracted directly from an educational file (e.g., notes, syllabus, or material).
 
 ---
@@ -115,5 +115,6 @@ Output:
 [{"order": 1, "title": "Understand Arrays", "brief": "Learn array structure and memory.", "completed": false},{"order": 3, "_id": "1", "title": "Understand C++ Pointers", "brief": "Relate pointers to arrays.", "completed": false}]
 """
 
-def get_roadmap_prompt(prev_goals):
-    return f"Previous goals to use: {prev_goals}\n\n You can only generate {MAX_GOALS - len(prev_goals)} new goals, but you can merge and/or reorder the previous ones with a new one as long as the total order is not more than {MAX_GOALS}" + PROMPT
+def get_roadmap_prompt(prev_goals, prev_count):
+    """prev_goals is the json context of the most recent previous goals, prev_count is how many the user has in total."""
+    return f"Previous goals to use: {prev_goals}\n\n The user has {prev_count} goals. You can only generate {max(0, MAX_GOALS - prev_count)} new goals, but you can merge and/or reorder the previous ones with a new one as long as the total order is not more than {MAX_GOALS}" + PROMPT
@@ -0,0 +1,104 @@
+# maintenance commands: python -m manage <command> [options]
+
+import argparse
+import json
+from database import ensure_indexes
+from services.dedupe_service import KINDS, backfill_index
+from services.ledger_service import get_ledger_report, get_top_users
+from services.notes_service import migrate_embedded_notes
+
+LEDGER_COLUMNS = ["stage", "op", "calls", "errors", "p50_ms", "p95_ms", "p99_ms", "avg_prompt_tokens", "avg_response_tokens", "upload_bytes", "cost_usd", "users"]
+
+def print_table(rows, columns):
+    widths = {column: max([len(column)] + [len(str(row.get(column))) for row in rows]) for column in columns}
+
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row.get(column)).ljust(widths[column]) for column in columns))
+
+def ledger_report(args):
+    report = get_ledger_report(args.hours, args.stage)
+
+    if args.json:
+        print(json.dumps({"stages": report, "top_users": get_top_users(args.hours, args.top)}, indent=2, default=str))
+        return
+
+    if not report:
+        print(f"No gemini calls recorded in the last {args.hours:g} hours")
+        return
+
+    print_table(report, LEDGER_COLUMNS)
+    print()
+    print_table(get_top_users(args.hours, args.top), ["user", "calls", "tokens", "cost_usd"])
+
+def ensure_indexes_command(args):
+    report = ensure_indexes()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    rows = [
+        {
+            "collection": entry["collection"],
+            "created": ", ".join(entry["created"]) or "-",
+            "existing": len(entry["existing"]),
+            "failed": ", ".join(failed["name"] for failed in entry["failed"]) or "-",
+            "seconds": entry["seconds"],
+        }
+        for entry in report
+    ]
+    print_table(rows, ["collection", "created", "existing", "failed", "seconds"])
+
+    for entry in report:
+        for failed in entry["failed"]:
+            print(f"\n[W] {entry['collection']}.{failed['name']}: {failed['error']}")
+
+def migrate_notes_command(args):
+    report = migrate_embedded_notes(args.keep_embedded)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print_table([report], ["users", "copied", "existing"])
+
+def backfill_dedupe_command(args):
+    report = backfill_index(args.kind)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print_table([{"kind": kind, "indexed": indexed} for kind, indexed in report.items()], ["kind", "indexed"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Cognidy maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ledger = commands.add_parser("ledger-report", help="Gemini latency percentiles, tokens and cost per stage")
+    ledger.add_argument("--hours", type=float, default=24, help="How far back to look")
+    ledger.add_argument("--stage", help="Only this stage, route or job kind")
+    ledger.add_argument("--top", type=int, default=10, help="Most expensive users to list")
+    ledger.add_argument("--json", action="store_true", help="Print the raw report as json")
+    ledger.set_defaults(run=ledger_report)
+
+    indexes = commands.add_parser("ensure-indexes", help="Create the missing indexes of constants/indexes.py")
+    indexes.add_argument("--json", action="store_true", help="Print the raw report as json")
+    indexes.set_defaults(run=ensure_indexes_command)
+
+    notes = commands.add_parser("migrate-notes", help="Move the notes embedded in user documents to the notes collection")
+    notes.add_argument("--keep-embedded", action="store_true", help="Copy the notes but leave users.notes in place")
+    notes.add_argument("--json", action="store_true", help="Print the raw report as json")
+    notes.set_defaults(run=migrate_notes_command)
+
+    dedupe = commands.add_parser("backfill-dedupe", help="Add existing quizzes, puzzles and flashcards to the dedupe index")
+    dedupe.add_argument("--kind", action="append", choices=list(KINDS), help="Only this kind, can be repeated")
+    dedupe.add_argument("--json", action="store_true", help="Print the raw report as json")
+    dedupe.set_defaults(run=backfill_dedupe_command)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field, field_validator
+
+
+class Flashcard(BaseModel):
+    front: str = Field(..., description="Question or prompt")
+    back: str = Field(..., description="Brief answer")
+
+    @field_validator("front", "back", mode="after")
+    @classmethod
+    def non_empty_strip(cls, value: str, info) -> str:
+        value = value.strip()
+
+        if not value:
+            raise ValueError(f"{info.field_name} must not be empty")
+
+        return value
@@ -0,0 +1,16 @@
+from typing import List
+from pydantic import BaseModel, Field
+from models.flashcard import Flashcard
+from models.puzzle_pairs import GeneratedPuzzle
+from models.quizzes import GeneratedQuiz
+from models.roadmap_goal import GeneratedGoal
+
+
+class CombinedContent(BaseModel):
+    goals: List[GeneratedGoal] = Field(default_factory=list)
+    quizzes: List[GeneratedQuiz] = Field(default_factory=list)
+    puzzles: List[GeneratedPuzzle] = Field(default_factory=list)
+
+class GuestContent(BaseModel):
+    flashcards: List[Flashcard] = Field(default_factory=list)
+    quizzes: List[GeneratedQuiz] = Field(default_factory=list)
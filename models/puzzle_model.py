@@ -33,4 +33,16 @@ class CrosswordPuzzle(BaseModel):
     puzzle_data: CrosswordPuzzleData
     created_at: datetime = Field(..., example="2023-01-01T00:00:00Z")
     completed: bool = Field(default=False, example=False)
-    completion_time: Optional[datetime] = Field(default=None, example=None)
\ No newline at end of file
+    completion_time: Optional[datetime] = Field(default=None, example=None)
+
+class CrosswordMetadata(BaseModel):
+    puzzleID: str = Field(..., example="20240101_120000_000")
+    title: str = Field(..., example="Crossword from sample.txt")
+    completed: bool = Field(default=False, example=False)
+    gridSize: int = Field(..., example=15)
+
+class GeneratedCrossword(BaseModel):
+    metadata: CrosswordMetadata
+    answerGrid: List[List[Optional[str]]] = Field(..., example=[["C", "A", "T"], [None, None, "A"], [None, None, "R"]])
+    userGrid: List[List[Optional[str]]] = Field(..., example=[[None, None, None], [None, None, None], [None, None, None]])
+    words: List[PuzzleWord] = Field(..., min_length=1)
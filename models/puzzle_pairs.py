@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 MAX_PUZZLES = 15
@@ -5,3 +6,7 @@ MAX_PUZZLES = 15
 class PuzzlePair(BaseModel):
     left: str = Field(..., description="Left")
     right: str = Field(..., description="Right")
+
+class GeneratedPuzzle(BaseModel):
+    id: Optional[str] = Field(None, alias="_id", description="Previous puzzle id when merged")
+    pairs: List[PuzzlePair] = Field(..., min_length=1, description="Pairs to match")
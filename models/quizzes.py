@@ -1,5 +1,5 @@
-from typing import List
-from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 MAX_QUIZZES = 15
 
@@ -18,3 +18,25 @@ class RoadmapGoal(BaseModel):
 
         return value
 
+class GeneratedQuiz(BaseModel):
+    id: Optional[str] = Field(None, alias="_id", description="Previous quiz id when merged")
+    question: str = Field(..., description="Question")
+    options: List[str] = Field(..., min_length=2, description="List of options")
+    correct: int = Field(..., ge=0, description="Index of the correct option")
+
+    @field_validator("question",  mode="after")
+    @classmethod
+    def non_empty_strip(cls, value: str, info) -> str:
+        value = value.strip()
+
+        if not value:
+            raise ValueError(f"{info.field_name} must not be empty")
+
+        return value
+
+    @model_validator(mode="after")
+    def correct_in_options(self):
+        if self.correct >= len(self.options):
+            raise ValueError("correct must be an index of options")
+
+        return self
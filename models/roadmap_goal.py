@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel, Field, field_validator
 
 MAX_GOALS = 15
@@ -17,3 +18,6 @@ class RoadmapGoal(BaseModel):
             raise ValueError(f"{info.field_name} must not be empty")
 
         return value
+
+class GeneratedGoal(RoadmapGoal):
+    id: Optional[str] = Field(None, alias="_id", description="Previous goal id when merged")
@@ -1,10 +1,12 @@
 # routes/crossword_puzzles.py
 from flask import Blueprint, request, jsonify
 from services.puzzles_service import generate_crossword_puzzle
+from utils.admission import admission_control
 
 crossword_bp = Blueprint('crosswords', __name__)
 
 @crossword_bp.route('/generate', methods=['POST'])
+@admission_control("crosswords")
 def generate_crossword():
     """Generate crossword puzzle from uploaded file (guest-only)"""
     try:
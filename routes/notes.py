@@ -1,33 +1,41 @@
 import os
-from threading import Thread
+import json
+import time
 from datetime import datetime, timezone
-import hashlib
 from bson import ObjectId
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import jwt_required
 from controllers.goals_controller import delete_user_goal
 from database import get_roadmap_goals_collection, get_users_collection
-from flask import Blueprint, jsonify, request
-from services.puzzle_pairs_service import generate_puzzles_background
-from services.roadmap_service import generate_roadmap_goals_background
-from services.quizzes_service import generate_quizzes_background
+from flask import Blueprint, Response, jsonify, request
+from services.guest_service import GuestDeadlineError, get_guest_content, guest_limiter
+from services.ingest_service import get_generation_stats, start_note_generation
+from services.notes_service import DuplicateNoteError, count_user_notes, create_note, delete_user_note, discard_note, get_note_statuses, get_user_note, get_user_notes, has_note_hash, is_generating
+from utils.admission import admission_control
+from utils.auth import get_current_user_id, operator_required
+from utils.executor import QueueFullError
+from utils.notes_utils import get_upload_hash
+from utils.status_events import get_status_version, wait_for_status_change
 from database import get_quizzes_collection
 from database import get_flashcards_collection
 
 
 
 MAX_UPLOADS = 5
+MAX_STATUS_IDS = 20
+STATUS_POLL_SECONDS = 5
+STATUS_STREAM_MAX_SECONDS = 120 # the stream then closes and EventSource reconnects after STATUS_STREAM_RETRY_MS
+STATUS_STREAM_RETRY_MS = 3000
 notes_bp = Blueprint("notes", __name__)
 
 @notes_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_notes():
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
-    user_notes = user.get("notes", [])
+    user_notes = get_user_notes(user_id)
 
     for note in user_notes:
         if "_id" in note:
@@ -45,15 +53,32 @@ def upload_guest():
     if file.filename == "":
         return jsonify({"error": "No selected file"}), 400
 
-    # data = TODO: call each MVP generate service, but roadmap_service and pairs puzzles
-    data = {} # of type {flashcards: [], puzzles: []}
+    allowed, retry_after = guest_limiter.take(request.remote_addr)
+    if not allowed:
+        response = jsonify({"error": "Too many guest uploads, try again later"})
+        response.headers["Retry-After"] = str(retry_after)
+        return response, 429
+
+    file_ext = os.path.splitext(str(file.filename))[1]
+    file_hash = get_upload_hash(file)
+
+    try:
+        data = get_guest_content(file.stream, file_ext, file_hash)
+    except QueueFullError:
+        return jsonify({"error": "Too many guest uploads are being processed, try again later"}), 503
+    except GuestDeadlineError:
+        return jsonify({"error": "Content generation took too long, try again later"}), 504
+    except Exception as error:
+        print(f"[E] Guest generation failed: {error}")
+        return jsonify({"error": "Failed to generate content"}), 502
 
     return jsonify({"message": "Content generated for guest user", "data": data}), 200
 
 @notes_bp.route("/upload/auth", methods=["POST"])
 @jwt_required()
+@admission_control("notes-upload", rate_limit=5)
 def upload_auth():
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
 
     if "file" not in request.files:
         return jsonify({"error": "No file part"}), 400
@@ -63,20 +88,15 @@ def upload_auth():
     if file.filename == "":
         return jsonify({"error": "No selected file"}), 400
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
-    user_notes = user.get("notes", [])
-    if len(user_notes) >= MAX_UPLOADS:
+    if count_user_notes(user_id) >= MAX_UPLOADS:
         return jsonify({"error": f"Upload limit reached ({MAX_UPLOADS})"}), 403
 
-    file_bytes = file.read()
-    file_hash = hashlib.sha256(file_bytes).hexdigest()
-    file.seek(0)
+    file_hash = get_upload_hash(file)
 
-    note_hashes = [n.get("hash") for n in user_notes]
-    if file_hash in note_hashes:
+    if has_note_hash(user_id, file_hash):
         return jsonify({"error": "This file has already been uploaded"}), 400
 
     note = {
@@ -92,19 +112,23 @@ def upload_auth():
             }
     }
 
-    file_bytes = file.read()
     file_ext = os.path.splitext(str(file.filename))[1]
 
-    goals_thread = Thread(target=generate_roadmap_goals_background, args=(file_bytes, file_ext, str(user["_id"]), str(note["_id"])))
-    goals_thread.start()
-
-    puzzles_pair_thread = Thread(target=generate_puzzles_background, args=(file_bytes, file_ext, str(user["_id"]), str(note["_id"])))
-    puzzles_pair_thread.start()
-
-    quizzes_thread = Thread(target=generate_quizzes_background, args=(file_bytes, file_ext, str(user["_id"]), str(note["_id"])))
-    quizzes_thread.start()
+    try:
+        # the unique (user_id, hash) index catches two uploads of the same file racing past the check above
+        create_note(user_id, note)
+    except DuplicateNoteError:
+        return jsonify({"error": "This file has already been uploaded"}), 400
 
-    get_users_collection().find_one_and_update({"username": username}, {"$push": {"notes": note}})
+    try:
+        start_note_generation(file.stream, file_ext, file_hash, user_id, str(note["_id"]))
+    except QueueFullError:
+        discard_note(user_id, note["_id"], note["status"])
+        return jsonify({"error": "Too many notes are being processed, try again later"}), 503
+    except Exception as error:
+        print(f"[E] failed to start generation for note {note['_id']}: {error}")
+        discard_note(user_id, note["_id"], note["status"])
+        return jsonify({"error": "Failed to start generating content, try again later"}), 500
 
     note["_id"] = str(note["_id"])
 
@@ -113,9 +137,9 @@ def upload_auth():
 @notes_bp.route("/delete/<note_id>", methods=["DELETE"])
 @jwt_required()
 def delete_note(note_id):
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
 
-    user = get_users_collection().find_one({"username": username})
+    user = get_users_collection().find_one({"_id": ObjectId(user_id)}, {"settings": 1}) if user_id else None
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -127,7 +151,7 @@ def delete_note(note_id):
     except Exception:
         return jsonify({"error": "Invalid note ID"}), 400
 
-    result = get_users_collection().update_one({"username": username}, {"$pull": {"notes": {"_id": note_oid}}})
+    deleted = delete_user_note(user_id, note_oid)
 
     if auto_delete:
         goals = get_roadmap_goals_collection().find({"note_id": note_id})
@@ -135,7 +159,7 @@ def delete_note(note_id):
         goals = goals.to_list()
 
         for goal in goals:
-            delete_user_goal(goal, str(user["_id"]))
+            delete_user_goal(goal, user_id)
 
                 # Delete quizzes related to this note
         get_quizzes_collection().delete_many({"note_id": note_id})
@@ -145,38 +169,107 @@ def delete_note(note_id):
 
 
 
-    if result.modified_count == 0:
+    if not deleted:
         return jsonify({"error": "Note not found for this user"}), 404
 
     return jsonify({"message": "Note was deleted"}), 200
 
 
-@notes_bp.route("/status/<note_id>", methods=["GET"])
+@notes_bp.route("/status", methods=["GET"])
 @jwt_required()
-def get_note_status(note_id):
-    username = get_jwt_identity()
+def get_notes_status():
+    user_id = get_current_user_id()
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+    note_ids = [note_id.strip() for note_id in request.args.get("ids", "").split(",") if note_id.strip()]
+    if not note_ids:
+        return jsonify({"error": "Missing 'ids' query parameter"}), 400
+
+    if len(note_ids) > MAX_STATUS_IDS:
+        return jsonify({"error": f"You can only request up to {MAX_STATUS_IDS} notes"}), 400
+
+    if not user_id:
+        return jsonify({"error": "User not found"}), 404
+
+    statuses = get_note_statuses(user_id, note_ids)
+
+    return jsonify({"message": "Fetched status successfully", "data": statuses}), 200
+
+def format_status_event(event, data, event_id=None):
+    event_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{event_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_note_statuses(user_id, resumed=False):
+    """resumed streams first send every note, one may have finished while the client was reconnecting."""
+    deadline = time.monotonic() + STATUS_STREAM_MAX_SECONDS
+    version = get_status_version(user_id)
+    sent = {}
+    events = 0
+
+    yield f"retry: {STATUS_STREAM_RETRY_MS}\n\n"
+
+    while True:
+        statuses = get_note_statuses(user_id)
+        changed = False
+
+        for note_id, status in statuses.items():
+            if sent.get(note_id) != status and (note_id in sent or resumed or is_generating(status)):
+                sent[note_id] = status
+                changed = True
+                events += 1
+                yield format_status_event("status", {"note_id": note_id, "status": status}, events)
+
+        resumed = False
+
+        if not any(is_generating(status) for status in statuses.values()):
+            yield format_status_event("done", {})
+            return
+
+        if time.monotonic() >= deadline:
+            return
+
+        if not changed:
+            yield ": keep-alive\n\n"
+
+        # woken early by update_note_status in this process, polling covers the job workers
+        version = wait_for_status_change(user_id, version, STATUS_POLL_SECONDS)
+
+@notes_bp.route("/status/stream", methods=["GET"])
+@jwt_required()
+@admission_control("notes-status", user_concurrency=1) # each open stream holds a request worker
+def stream_notes_status():
+    user_id = get_current_user_id()
+
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
+    return Response(
+            stream_note_statuses(user_id, "Last-Event-ID" in request.headers),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@notes_bp.route("/status/<note_id>", methods=["GET"])
+@jwt_required()
+def get_note_status(note_id):
+    user_id = get_current_user_id()
+
     try:
         note_oid = ObjectId(note_id)
     except Exception:
         return jsonify({"error": "Invalid note ID"}), 400
 
-    if "notes" not in user or len(user["notes"]) <= 0:
-        return jsonify({"message": "User does not have uploaded notes"}), 404
-    
-    notes = user["notes"]
-    user_note = {}
+    if not user_id:
+        return jsonify({"error": "User not found"}), 404
 
-    for note in notes:
-        if note["_id"] == note_oid:
-            user_note = note
+    user_note = get_user_note(user_id, note_oid, {"status": 1})
 
     if not user_note:
         return jsonify({"message": "User note not found"}), 404
 
     return jsonify({"message": "Fetched status successfully", "data": user_note["status"]}), 200
 
+@notes_bp.route("/generation/stats", methods=["GET"])
+@jwt_required()
+@operator_required
+def get_note_generation_stats():
+    return jsonify({"message": "Fetched generation stats successfully", "data": get_generation_stats()}), 200
@@ -1,6 +1,8 @@
-from flask_jwt_extended import get_jwt_identity, jwt_required
-from database import get_puzzles_collection, get_users_collection
+from flask_jwt_extended import jwt_required
+from database import get_puzzles_collection
 from flask import Blueprint, jsonify
+from services.notes_service import get_note_filenames
+from utils.auth import get_current_user_id
 import random
 
 puzzles_pair_bp = Blueprint("puzzles-pairs", __name__)
@@ -9,17 +11,16 @@ puzzles_pair_bp = Blueprint("puzzles-pairs", __name__)
 @puzzles_pair_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_puzzles():
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
-    puzzles = get_puzzles_collection().find({"user_id": str(user["_id"])}, {"user_id": 0})
+    puzzles = get_puzzles_collection().find({"user_id": user_id}, {"user_id": 0})
     puzzles = puzzles.to_list()
     random.shuffle(puzzles)
 
-    user_notes = {str(note["_id"]): note["filename"] for note in user.get("notes", [])}
+    user_notes = get_note_filenames(user_id, [item.get("note_id") for item in puzzles])
 
     for puzzle in puzzles:
         puzzle["_id"] = str(puzzle["_id"])
@@ -1,6 +1,8 @@
-from flask_jwt_extended import get_jwt_identity, jwt_required
-from database import get_quizzes_collection, get_users_collection
+from flask_jwt_extended import jwt_required
+from database import get_quizzes_collection
 from flask import Blueprint, jsonify
+from services.notes_service import get_note_filenames
+from utils.auth import get_current_user_id
 import random
 
 quizzes_bp = Blueprint("quizzes", __name__)
@@ -9,17 +11,16 @@ quizzes_bp = Blueprint("quizzes", __name__)
 @quizzes_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_quizzes():
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
-    quizzes = get_quizzes_collection().find({"user_id": str(user["_id"])}, {"user_id": 0})
+    quizzes = get_quizzes_collection().find({"user_id": user_id}, {"user_id": 0})
     quizzes = quizzes.to_list()
     random.shuffle(quizzes)
 
-    user_notes = {str(note["_id"]): note["filename"] for note in user.get("notes", [])}
+    user_notes = get_note_filenames(user_id, [item.get("note_id") for item in quizzes])
 
     for quiz in quizzes:
         quiz["_id"] = str(quiz["_id"])
@@ -1,8 +1,9 @@
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import jwt_required
 from pydantic import ValidationError
 from controllers.goals_controller import create_user_goal, delete_user_goal, get_user_goals_count
-from database import get_roadmap_goals_collection, get_users_collection
+from database import get_roadmap_goals_collection
 from flask import Blueprint, jsonify, request
+from utils.auth import get_current_user_id
 
 from models.roadmap_goal import MAX_GOALS, RoadmapGoal
 
@@ -11,13 +12,12 @@ roadmap_bp = Blueprint("roadmap_goals", __name__)
 @roadmap_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_goals():
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
-    goals = get_roadmap_goals_collection().find({"user_id": str(user["_id"])}, {"_id": 0, "user_id": 0})
+    goals = get_roadmap_goals_collection().find({"user_id": user_id}, {"_id": 0, "user_id": 0})
     goals.sort("order")
     goals = goals.to_list()
 
@@ -27,21 +27,20 @@ def get_goals():
 @jwt_required()
 def create_goal():
     try:
-        username = get_jwt_identity()
+        user_id = get_current_user_id()
         data = request.get_json()
         goal = RoadmapGoal(**data)
         new_goal = goal.model_dump()
-        user = get_users_collection().find_one({"username": username}, {"user_id": 1})
 
-        if not user:
+        if not user_id:
             return jsonify({"error": "User not found"}), 404
 
-        goals_size = get_user_goals_count(str(user["_id"]))
+        goals_size = get_user_goals_count(user_id)
 
         if goals_size >= MAX_GOALS:
             return jsonify({"error": f"You can only have up to {MAX_GOALS} goals"}), 409
 
-        created = create_user_goal(str(user["_id"]), new_goal, None)
+        created = create_user_goal(user_id, new_goal, None)
 
         if created:
             return jsonify({"message": "Roadmap Goal created successfully"}), 201
@@ -54,18 +53,17 @@ def create_goal():
 @roadmap_bp.route("/delete/<int:goal_order>", methods=["DELETE"])
 @jwt_required()
 def delete_goal(goal_order):
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
-    goal_to_delete = get_roadmap_goals_collection().find_one({"user_id": str(user["_id"]), "order": goal_order}, {"order": 1, "_id": 1})
+    goal_to_delete = get_roadmap_goals_collection().find_one({"user_id": user_id, "order": goal_order}, {"order": 1, "_id": 1})
 
     if not goal_to_delete:
         return jsonify({"error": "Goal does not exists for this user"}), 404
 
-    success, msg = delete_user_goal(goal_to_delete, str(user["_id"]))
+    success, msg = delete_user_goal(goal_to_delete, user_id)
 
     if success:
         return jsonify({"message": msg}), 200
@@ -75,15 +73,15 @@ def delete_goal(goal_order):
 @roadmap_bp.route("/complete/<int:goal_order>", methods=["PUT"])
 @jwt_required()
 def set_goal_completion(goal_order):
-    username = get_jwt_identity()
+    user_id = get_current_user_id()
     data = request.get_json()
     completed = data.get("completed")
 
     if completed is None:
         return jsonify({"error": "Missing 'completed' field"}), 400
 
-    user = get_users_collection().find_one({"username": username})
-    if not user:
+
+    if not user_id:
         return jsonify({"error": "User not found"}), 404
 
     order_filter = {"$gte": goal_order}
@@ -92,7 +90,7 @@ def set_goal_completion(goal_order):
         order_filter = goal_order
 
     result = get_roadmap_goals_collection().update_many(
-            {"user_id": str(user["_id"]), "order": order_filter},
+            {"user_id": user_id, "order": order_filter},
             {"$set": {"completed": completed}}
     )
 
@@ -1,7 +1,8 @@
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended.utils import create_access_token
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import get_users_collection
+from pymongo import ReturnDocument
+from utils.auth import create_user_token, forget_token_version
 from flask import Blueprint, request, jsonify
 import os
 import re
@@ -41,15 +42,15 @@ def signup():
     hashed_pw = generate_password_hash(password, method="pbkdf2:sha256")
 
     # Insert user
-    get_users_collection().insert_one(
-        {"username": username, "email": email, "password": hashed_pw,
+    new_user = {"username": username, "email": email, "password": hashed_pw, "token_version": 0,
          "settings": {
         "autoDeleteGeneratedContent": True 
         }
-    })
+    }
+    get_users_collection().insert_one(new_user)
     
 
-    access_token = create_access_token(identity=username)
+    access_token = create_user_token(new_user)
 
     return jsonify({"message": "Signup successful!", "data": access_token}), 201
 
@@ -67,7 +68,7 @@ def login():
     user = get_users_collection().find_one({"username": username})
 
     if user and check_password_hash(user["password"], password):
-        access_token = create_access_token(identity=user["username"])
+        access_token = create_user_token(user)
         return jsonify({"message": "Login successful", "data": access_token}), 200
     else:
         return jsonify({"error": "Invalid credentials"}), 401
@@ -78,7 +79,7 @@ def login():
 @jwt_required()
 def get_current_user():
     current_username = get_jwt_identity()
-    user = get_users_collection().find_one({"username": current_username})
+    user = get_users_collection().find_one({"username": current_username}, {"username": 1, "email": 1})
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -158,14 +159,21 @@ def update_user():
         return jsonify({"error": "Username already taken"}), 400
 
 
-    # Update user info
-    users.update_one(
+    # Update user info, the version bump revokes tokens issued for the old username
+    user = users.find_one_and_update(
         {"username": current_username},
-        {"$set": {"username": new_username}}
+        {"$set": {"username": new_username}, "$inc": {"token_version": 1}},
+        projection={"username": 1, "token_version": 1},
+        return_document=ReturnDocument.AFTER
     )
 
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    forget_token_version(str(user["_id"]), current_username)
+
     # Issue new token so frontend stays in sync
-    new_token = create_access_token(identity=new_username)
+    new_token = create_user_token(user)
 
     return jsonify({
         "message": "Profile updated successfully!",
@@ -190,7 +198,7 @@ def reset_password():
         return jsonify({"error": "Weak password. Must include upper, lower, number, special, 8+ chars."}), 400
 
     users = get_users_collection()
-    user = users.find_one({"username": current_username})
+    user = users.find_one({"username": current_username}, {"password": 1})
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -221,7 +229,7 @@ def check_password():
         return jsonify({"data": {"valid": False}}), 200
 
     users = get_users_collection()
-    user = users.find_one({"username": current_username})
+    user = users.find_one({"username": current_username}, {"password": 1})
 
 
     if not user:
@@ -0,0 +1,65 @@
+from constants.combined_prompt import get_combined_prompt
+from models.generated_content import CombinedContent
+from services import puzzle_pairs_service, quizzes_service, roadmap_service
+from services.context_service import record_prompt
+from services.generation_cache_service import generate_once, get_cached_output
+from services.notes_service import update_note_status
+from utils.gemini import generate
+from utils.gemini_utils import StructuredOutput, note_part
+
+
+COMBINED_OUTPUT = StructuredOutput(CombinedContent)
+
+# section name in note["status"] -> save_to_DB of the service that owns it
+SAVERS = {
+    "goals": roadmap_service.save_to_DB,
+    "quizzes": quizzes_service.save_to_DB,
+    "puzzles": puzzle_pairs_service.save_to_DB,
+}
+
+def failed_results(msg):
+    return {section: (False, msg) for section in SAVERS}
+
+def request_combined(note_content, user_id):
+    prompt = record_prompt("combined", get_combined_prompt(
+            roadmap_service.get_previous_goals(user_id),
+            quizzes_service.get_previous_quizzes(user_id),
+            puzzle_pairs_service.get_previous_puzzles(user_id)
+    ))
+
+    return COMBINED_OUTPUT.parse(generate(prompt, [note_part(note_content)], COMBINED_OUTPUT))
+
+def generate_combined(note_content, user_id, file_id, file_hash=None):
+    """Generates goals, quizzes and puzzles in one model call, returns {section: (success, msg)}."""
+    response_obj = get_cached_output(file_hash, "combined", user_id)
+
+    if response_obj is None:
+        try:
+            response_obj = generate_once(file_hash, "combined", user_id, lambda: request_combined(note_content, user_id))
+        except Exception as error:
+            print(error)
+            return failed_results("[E] Failed to generate content")
+
+    results = {}
+    for section, save in SAVERS.items():
+        try:
+            save(response_obj.get(section, []), file_id, user_id)
+            results[section] = (True, "")
+        except Exception as error:
+            print(error)
+            results[section] = (False, f"[E] Failed to save {section} to Database")
+
+    return results
+
+def generate_combined_background(note_file, user_id, file_id):
+    try:
+        results = generate_combined(note_file.content, user_id, file_id, note_file.file_hash)
+    except Exception as e:
+        print(f"[E] Combined generation failed: {e}")
+        results = failed_results("")
+    finally:
+        note_file.release()
+
+    for section, (success, msg) in results.items():
+        print(msg)
+        update_note_status(user_id, file_id, section, "done" if success else "failed")
@@ -0,0 +1,76 @@
+import json
+import threading
+from config.env_config import get_env_config
+from utils.text_utils import estimate_tokens
+
+env = get_env_config()
+
+MAX_TEXT_CHARS = 160
+
+_prompt_stats = {}
+_stats_lock = threading.Lock()
+
+def shorten(text, max_chars=MAX_TEXT_CHARS):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+def goal_fingerprint(goal):
+    return {"_id": str(goal["_id"]), "order": goal.get("order"), "title": shorten(goal.get("title")), "completed": goal.get("completed", False)}
+
+def quiz_fingerprint(quiz):
+    return {"_id": str(quiz["_id"]), "question": shorten(quiz.get("question"))}
+
+def puzzle_fingerprint(puzzle):
+    return {"_id": str(puzzle["_id"]), "terms": [shorten(pair.get("left"), 40) for pair in puzzle.get("pairs", [])]}
+
+def select_within_budget(fingerprints, max_tokens):
+    """Keeps fingerprints in the given order until the next one would go past max_tokens."""
+    selected = []
+    used = 2 # the surrounding []
+
+    for fingerprint in fingerprints:
+        tokens = estimate_tokens(json.dumps(fingerprint, ensure_ascii=False)) + 1
+        if used + tokens > max_tokens:
+            break
+
+        selected.append(fingerprint)
+        used += tokens
+
+    return selected
+
+def build_context(collection, user_id, projection, fingerprint, sort_key=None):
+    """Returns (json of the newest previous items that fit PROMPT_CONTEXT_TOKENS, total number of previous items)."""
+    query = {"user_id": user_id}
+    total = collection.count_documents(query)
+
+    if total == 0:
+        return "[]", 0
+
+    docs = collection.find(query, projection).sort("_id", -1).limit(env.PROMPT_CONTEXT_MAX_ITEMS)
+    selected = select_within_budget([fingerprint(doc) for doc in docs], env.PROMPT_CONTEXT_TOKENS)
+
+    if sort_key is not None:
+        selected.sort(key=sort_key)
+
+    return json.dumps(selected, ensure_ascii=False), total
+
+def record_prompt(stage, prompt):
+    tokens = estimate_tokens(prompt)
+
+    with _stats_lock:
+        stats = _prompt_stats.setdefault(stage, {"prompts": 0, "total_tokens": 0, "max_tokens": 0, "last_tokens": 0})
+        stats["prompts"] += 1
+        stats["total_tokens"] += tokens
+        stats["max_tokens"] = max(stats["max_tokens"], tokens)
+        stats["last_tokens"] = tokens
+
+    print(f"{stage} prompt: ~{tokens} tokens")
+
+    return prompt
+
+def get_prompt_stats():
+    with _stats_lock:
+        return {
+            stage: {**stats, "avg_tokens": stats["total_tokens"] // stats["prompts"]}
+            for stage, stats in _prompt_stats.items()
+        }
@@ -0,0 +1,161 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+from config.env_config import get_env_config
+from database import get_dedupe_index_collection, get_flashcards_collection, get_puzzles_collection, get_quizzes_collection
+from utils.minhash import band_keys, signature, similarity
+
+env = get_env_config()
+
+# kind -> (collection getter, owner field in that collection)
+KINDS = {
+    "quizzes": (get_quizzes_collection, "user_id"),
+    "puzzles": (get_puzzles_collection, "user_id"),
+    "flashcards": (get_flashcards_collection, "username"),
+}
+
+def quiz_text(quiz):
+    return " ".join([quiz.get("question") or ""] + [str(option) for option in quiz.get("options") or []])
+
+def puzzle_text(puzzle):
+    return " ".join(f"{pair.get('left', '')} {pair.get('right', '')}" for pair in puzzle.get("pairs") or [])
+
+def flashcard_text(card):
+    return f"{card.get('front') or ''} {card.get('back') or ''}"
+
+TEXTS = {"quizzes": quiz_text, "puzzles": puzzle_text, "flashcards": flashcard_text}
+
+def _live_ids(kind, owner, item_ids):
+    get_collection, owner_field = KINDS[kind]
+    docs = get_collection().find({"_id": {"$in": item_ids}, owner_field: owner}, {"_id": 1})
+
+    return {doc["_id"] for doc in docs}
+
+def _find_existing(kind, owner, sigs):
+    """Id of a live near-duplicate already in the index for each signature, or None, with one index query."""
+    keys = {key for sig in sigs if sig is not None for key in band_keys(sig)}
+    if not keys:
+        return [None] * len(sigs)
+
+    try:
+        candidates = get_dedupe_index_collection().find(
+                {"owner": owner, "kind": kind, "bands": {"$in": list(keys)}},
+                {"item_id": 1, "signature": 1}
+        ).to_list()
+
+        matches = []
+        for sig in sigs:
+            scored = sorted(
+                    ((similarity(sig, candidate["signature"]), candidate["item_id"]) for candidate in candidates),
+                    reverse=True
+            ) if sig is not None else []
+            matches.append([item_id for score, item_id in scored if score >= env.DEDUPE_THRESHOLD])
+
+        matched = {item_id for item_ids in matches for item_id in item_ids}
+        if not matched:
+            return [None] * len(sigs)
+
+        live = _live_ids(kind, owner, list(matched))
+        stale = list(matched - live)
+        if stale:
+            get_dedupe_index_collection().delete_many({"kind": kind, "item_id": {"$in": stale}})
+
+        return [next((item_id for item_id in item_ids if item_id in live), None) for item_ids in matches]
+    except Exception as error:
+        # dedupe only keeps collections tidy, saving must go on without it
+        print(f"[W] dedupe lookup failed for {kind}: {error}")
+
+    return [None] * len(sigs)
+
+def find_duplicate(kind, owner, item, pending=None):
+    """Returns (id of an existing near-duplicate or None, signature of item to pass to index_item).
+
+    pending maps ids of items about to be written in the same batch to their signatures, they are not indexed yet.
+    Index entries of items deleted since are cleaned up here, so delete paths don't have to know about the index.
+    """
+    sig = signature(TEXTS[kind](item))
+
+    if sig is None or not env.DEDUPE_ENABLED:
+        return None, sig
+
+    for item_id, pending_sig in (pending or {}).items():
+        if pending_sig is not None and similarity(sig, pending_sig) >= env.DEDUPE_THRESHOLD:
+            return item_id, sig
+
+    return _find_existing(kind, owner, [sig])[0], sig
+
+def find_duplicates(kind, owner, items):
+    """find_duplicate for a whole batch with one index query, returns [(duplicate id or None, signature)] in order.
+
+    Items must carry their new _id, an item repeating an earlier one of the batch gets that item's _id.
+    """
+    sigs = [signature(TEXTS[kind](item)) for item in items]
+
+    if not env.DEDUPE_ENABLED:
+        return [(None, sig) for sig in sigs]
+
+    results = []
+    kept = []
+    for item, sig, duplicate_id in zip(items, sigs, _find_existing(kind, owner, sigs)):
+        if sig is not None and duplicate_id is None:
+            duplicate_id = next((item_id for item_id, kept_sig in kept if similarity(sig, kept_sig) >= env.DEDUPE_THRESHOLD), None)
+
+            if duplicate_id is None:
+                kept.append((item["_id"], sig))
+
+        results.append((duplicate_id, sig))
+
+    return results
+
+def signature_pairs(kind, items):
+    """(_id, signature) of items that are already saved, to index them again after an edit."""
+    return [(item["_id"], signature(TEXTS[kind](item))) for item in items]
+
+def index_writes(kind, owner, pairs):
+    """(collection, operations) upserting the index entries of (item_id, signature) pairs, for a bulk write."""
+    operations = [
+        UpdateOne(
+                {"kind": kind, "item_id": ObjectId(item_id)},
+                {"$set": {"owner": owner, "bands": band_keys(sig), "signature": sig}},
+                upsert=True
+        )
+        for item_id, sig in pairs
+        if sig is not None
+    ]
+
+    return get_dedupe_index_collection(), operations
+
+def index_items(kind, owner, pairs):
+    collection, operations = index_writes(kind, owner, pairs)
+    if not operations:
+        return
+
+    try:
+        collection.bulk_write(operations, ordered=False)
+    except Exception as error:
+        print(f"[W] failed to index {len(operations)} {kind} for dedupe: {error}")
+
+def index_item(kind, owner, item_id, sig):
+    index_items(kind, owner, [(item_id, sig)])
+
+def reindex_item(kind, owner, item_id, item):
+    index_item(kind, owner, item_id, signature(TEXTS[kind](item)))
+
+def remove_item(kind, item_id):
+    try:
+        get_dedupe_index_collection().delete_one({"kind": kind, "item_id": ObjectId(item_id)})
+    except Exception as error:
+        print(f"[W] failed to remove {kind} {item_id} from dedupe index: {error}")
+
+def backfill_index(kinds=None):
+    """Indexes the items saved before dedupe existed, returns {kind: indexed items}. Safe to run again."""
+    report = {}
+
+    for kind in kinds or KINDS:
+        get_collection, owner_field = KINDS[kind]
+        report[kind] = 0
+
+        for item in get_collection().find({owner_field: {"$exists": True}}):
+            reindex_item(kind, item[owner_field], item["_id"], item)
+            report[kind] += 1
+
+    return report
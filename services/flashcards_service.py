@@ -0,0 +1,110 @@
+import hashlib
+from config.env_config import get_env_config
+from constants.flashcards_prompt import MULTI_CARD_PROMPT, SINGLE_CARD_PROMPT, get_cards_prompt, get_single_card_prompt
+from models.flashcard import Flashcard
+from pydantic import ValidationError
+from utils.gemini import generate, generate_stream
+from utils.gemini_utils import StructuredOutput, iter_array_items
+from utils.response_cache import ResponseCache
+from utils.single_flight import SingleFlight
+
+env = get_env_config()
+
+PROMPT_VERSION = hashlib.sha256((SINGLE_CARD_PROMPT + MULTI_CARD_PROMPT).encode()).hexdigest()[:12]
+
+card_cache = ResponseCache(env.AI_CARD_CACHE_ENTRIES, env.AI_CARD_CACHE_BYTES, env.AI_CARD_CACHE_TTL_SECONDS)
+card_flight = SingleFlight()
+
+CARD_OUTPUT = StructuredOutput(Flashcard)
+CARDS_OUTPUT = StructuredOutput(list[Flashcard])
+
+class FlashcardGenerationError(Exception):
+    """Carries the JSON error body the study routes answer with."""
+
+    def __init__(self, error, preview=None):
+        super().__init__(error)
+        self.body = {"error": error}
+        if preview is not None:
+            self.body["preview"] = preview
+
+def normalize_topic(topic):
+    return " ".join(topic.lower().split()).rstrip("?.!")
+
+def parse_cards(resp, output):
+    try:
+        return output.parse(resp)
+    except ValueError:
+        raise FlashcardGenerationError("bad_json", (resp.text or "")[:200])
+
+def request_single_card(topic):
+    return [parse_cards(generate(get_single_card_prompt(topic), schema=CARD_OUTPUT), CARD_OUTPUT)]
+
+def request_cards(topic, count):
+    cards = parse_cards(generate(get_cards_prompt(topic, count), schema=CARDS_OUTPUT), CARDS_OUTPUT)
+
+    if len(cards) == 0:
+        raise FlashcardGenerationError("bad_json_shape", cards)
+
+    return cards
+
+def get_ai_cards(topic, count=None, fresh=False):
+    """Returns [{front, back}], count None uses the single card prompt of /ai-card.
+
+    Cards are cached by normalized topic, and concurrent requests for the same topic share one Gemini call.
+    fresh skips the cached cards and replaces them, for callers that already got them.
+    """
+    key = ("card" if count is None else "cards", normalize_topic(topic), count or 1, PROMPT_VERSION)
+    cards = None if fresh else card_cache.get(key)
+
+    if cards is None:
+        cards, _ = card_flight.do(key, request_and_cache_cards, key, topic, count)
+
+    return [dict(card) for card in cards]
+
+def stream_ai_cards(topic, count):
+    """Yields {front, back} cards one at a time as Gemini writes them.
+
+    A cached topic is replayed from the cache, a streamed generation can't be shared so it skips the single flight,
+    the cards are only cached when the stream delivered all of them.
+    """
+    key = ("cards", normalize_topic(topic), count, PROMPT_VERSION)
+    cards = card_cache.get(key)
+
+    if cards is not None:
+        for card in cards:
+            yield dict(card)
+        return
+
+    cards = []
+    chunks = generate_stream(get_cards_prompt(topic, count), schema=CARDS_OUTPUT)
+
+    try:
+        for item in iter_array_items(chunks):
+            try:
+                card = CARD_OUTPUT.validate(item)
+            except ValidationError:
+                print(f"[W] skipping invalid streamed card: {str(item)[:200]}")
+                continue
+
+            cards.append(card)
+            yield dict(card)
+
+            if len(cards) == count:
+                break
+    except ValueError as error:
+        raise FlashcardGenerationError("bad_json", str(error))
+
+    if len(cards) == count:
+        card_cache.set(key, cards)
+
+def request_and_cache_cards(key, topic, count):
+    cards = request_single_card(topic) if count is None else request_cards(topic, count)
+    card_cache.set(key, cards)
+
+    return cards
+
+def get_card_stats():
+    stats = card_cache.stats()
+    stats["single_flight"] = card_flight.stats()
+
+    return stats
@@ -0,0 +1,156 @@
+import copy
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from bson import json_util
+from pymongo import ReturnDocument
+from config.env_config import get_env_config
+from constants import combined_prompt, puzzles_pair_prompt, quizzes_prompt, roadmap_prompt
+from database import get_generation_cache_collection
+from utils.single_flight import SingleFlight
+
+env = get_env_config()
+
+def prompt_version(*prompts):
+    return hashlib.sha256("".join(prompts).encode()).hexdigest()[:12]
+
+# editing a prompt changes its version, so older cached output is never served for it
+PROMPT_VERSIONS = {
+    "goals": prompt_version(roadmap_prompt.PROMPT),
+    "puzzles": prompt_version(puzzles_pair_prompt.PROMPT),
+    "quizzes": prompt_version(quizzes_prompt.PROMPT),
+    "combined": prompt_version(combined_prompt.PROMPT, roadmap_prompt.PROMPT, quizzes_prompt.PROMPT, puzzles_pair_prompt.PROMPT),
+}
+
+note_flight = SingleFlight()
+
+_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+def _count(counter, amount=1):
+    with _lock:
+        _counters[counter] += amount
+
+def _cache_key(file_hash, stage):
+    return f"{file_hash}:{stage}:{PROMPT_VERSIONS[stage]}"
+
+def items_for_user(output, owner, user_id):
+    """Cached output as user_id may save it.
+
+    The output was generated with the owner's previous items in the prompt, items carrying an _id were merged with
+    the owner's documents, so other users only get the items that are new.
+    """
+    if isinstance(output, dict):
+        return {section: items_for_user(items, owner, user_id) for section, items in output.items()}
+
+    return [item for item in output if owner == user_id or "_id" not in item]
+
+def get_cached_output(file_hash, stage, user_id):
+    if not file_hash:
+        return None
+
+    now = datetime.now(timezone.utc)
+    entry = get_generation_cache_collection().find_one_and_update(
+            {"_id": _cache_key(file_hash, stage), "expires_at": {"$gt": now}},
+            {"$set": {"last_hit_at": now}, "$inc": {"hits": 1}},
+            {"output": 1, "user_id": 1},
+            return_document=ReturnDocument.AFTER
+    )
+
+    if entry is None:
+        _count("misses")
+        return None
+
+    _count("hits")
+    return items_for_user(entry["output"], entry.get("user_id"), user_id)
+
+def has_cached_output(file_hash, stage):
+    if not file_hash:
+        return False
+
+    return get_generation_cache_collection().count_documents(
+            {"_id": _cache_key(file_hash, stage), "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            limit=1
+    ) > 0
+
+def store_output(file_hash, stage, user_id, output):
+    if not file_hash:
+        return
+
+    now = datetime.now(timezone.utc)
+
+    try:
+        get_generation_cache_collection().replace_one(
+                {"_id": _cache_key(file_hash, stage)},
+                {
+                    "hash": file_hash,
+                    "stage": stage,
+                    "prompt_version": PROMPT_VERSIONS[stage],
+                    "user_id": user_id, # whose previous items were in the prompt
+                    "output": output,
+                    "size_bytes": len(json.dumps(output, default=json_util.default)),
+                    "hits": 0,
+                    "created_at": now,
+                    "last_hit_at": now,
+                    "expires_at": now + timedelta(seconds=env.GENERATION_CACHE_TTL_SECONDS),
+                },
+                upsert=True
+        )
+        _count("stores")
+        evict_entries()
+    except Exception as error:
+        print(f"[W] failed to cache {stage} output: {error}")
+
+def evict_entries():
+    cache = get_generation_cache_collection()
+    expired = cache.delete_many({"expires_at": {"$lte": datetime.now(timezone.utc)}}).deleted_count
+
+    overflow = cache.estimated_document_count() - env.GENERATION_CACHE_MAX_ENTRIES
+    evicted = 0
+    if overflow > 0:
+        stale = cache.find({}, {"_id": 1}).sort("last_hit_at", 1).limit(overflow)
+        evicted = cache.delete_many({"_id": {"$in": [entry["_id"] for entry in stale]}}).deleted_count
+
+    _count("evictions", expired + evicted + evict_over_bytes(cache))
+
+def evict_over_bytes(cache):
+    """Drops the least recently used entries until their size_bytes add up to GENERATION_CACHE_MAX_BYTES."""
+    totals = cache.aggregate([{"$group": {"_id": None, "bytes": {"$sum": "$size_bytes"}}}]).to_list()
+    excess = (totals[0]["bytes"] if totals else 0) - env.GENERATION_CACHE_MAX_BYTES
+    if excess <= 0:
+        return 0
+
+    stale = []
+    for entry in cache.find({}, {"size_bytes": 1}).sort("last_hit_at", 1):
+        stale.append(entry["_id"])
+        excess -= entry.get("size_bytes", 0)
+        if excess <= 0:
+            break
+
+    return cache.delete_many({"_id": {"$in": stale}}).deleted_count
+
+def generate_once(file_hash, stage, user_id, request):
+    """Runs request once for concurrent uploads of the same note in this process and caches its output."""
+    if not file_hash:
+        return request()
+
+    def run():
+        output = request()
+        store_output(file_hash, stage, user_id, output)
+        return output, user_id
+
+    (output, owner), shared = note_flight.do(_cache_key(file_hash, stage), run)
+
+    # leader and followers share one output and save_to_DB mutates its items, each caller gets its own copy
+    return copy.deepcopy(items_for_user(output, owner, user_id) if shared else output)
+
+def get_cache_stats():
+    with _lock:
+        stats = dict(_counters)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["single_flight"] = note_flight.stats()
+
+    return stats
@@ -0,0 +1,84 @@
+import threading
+from concurrent.futures import TimeoutError
+from cachetools import TTLCache
+from config.env_config import get_env_config
+from constants.guest_prompt import MAX_GUEST_FLASHCARDS, MAX_GUEST_QUIZZES, get_guest_prompt
+from models.generated_content import GuestContent
+from utils.executor import BoundedExecutor
+from utils.gemini import delete_file, generate, upload_file
+from utils.gemini_ledger import with_gemini_context
+from utils.gemini_utils import StructuredOutput, note_part
+from utils.notes_utils import remove_tmp_file, save_tmp_stream
+from utils.rate_limit import TokenBucketLimiter
+from utils.text_utils import extract_note_text
+
+env = get_env_config()
+
+# kept apart from the authenticated stages so guests can never take their threads
+guest_executor = BoundedExecutor("guest", env.GUEST_WORKERS, env.GUEST_QUEUE_SIZE)
+guest_limiter = TokenBucketLimiter(env.GUEST_UPLOADS_BURST, env.GUEST_UPLOAD_REFILL_SECONDS)
+
+_cache = TTLCache(maxsize=env.GUEST_CACHE_SIZE, ttl=env.GUEST_CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
+
+GUEST_OUTPUT = StructuredOutput(GuestContent)
+
+class GuestDeadlineError(Exception):
+    pass
+
+def clean_quizzes(items):
+    # same shape GET /api/quizzes returns
+    return [
+        {"question": item["question"], "options": item["options"], "correct": item["options"][item["correct"]]}
+        for item in items[:MAX_GUEST_QUIZZES]
+    ]
+
+def generate_guest_content(file_path, file_hash):
+    genai_file = None
+
+    try:
+        note_content = extract_note_text(file_path)
+
+        if note_content is None:
+            genai_file = upload_file(file_path)
+            note_content = genai_file
+
+        response_obj = GUEST_OUTPUT.parse(generate(get_guest_prompt(), [note_part(note_content)], GUEST_OUTPUT))
+    finally:
+        remove_tmp_file(file_path)
+
+        if genai_file is not None:
+            delete_file(genai_file.name)
+
+    data = {
+        "flashcards": response_obj["flashcards"][:MAX_GUEST_FLASHCARDS],
+        "quizzes": clean_quizzes(response_obj["quizzes"]),
+    }
+
+    # filled even when the request already gave up waiting, so a refresh is served from here
+    if data["flashcards"] or data["quizzes"]:
+        with _cache_lock:
+            _cache[file_hash] = data
+
+    return data
+
+def get_guest_content(file_stream, file_ext, file_hash):
+    """Raises QueueFullError when the guest pool is busy and GuestDeadlineError past GUEST_DEADLINE_SECONDS."""
+    with _cache_lock:
+        data = _cache.get(file_hash)
+
+    if data is not None:
+        return data
+
+    file_path = save_tmp_stream(file_stream, file_ext)
+
+    try:
+        future = guest_executor.submit(with_gemini_context("guest", None, generate_guest_content), file_path, file_hash)
+    except Exception:
+        remove_tmp_file(file_path)
+        raise
+
+    try:
+        return future.result(timeout=env.GUEST_DEADLINE_SECONDS)
+    except TimeoutError:
+        raise GuestDeadlineError("Guest generation took too long")
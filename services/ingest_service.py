@@ -0,0 +1,127 @@
+import threading
+from bson import Binary
+from config.env_config import get_env_config
+from database import get_pool_stats
+from services.combined_service import generate_combined_background
+from services.context_service import get_prompt_stats
+from services.generation_cache_service import get_cache_stats, has_cached_output
+from services.jobs_service import enqueue_job
+from services.notes_service import update_note_status
+from services.puzzle_pairs_service import generate_puzzles_background
+from services.quizzes_service import generate_quizzes_background
+from services.roadmap_service import generate_roadmap_goals_background
+from utils.executor import BoundedExecutor, QueueFullError
+from utils.gemini import delete_file, get_gemini_stats, upload_file
+from utils.gemini_ledger import get_ledger_stats, with_gemini_context
+from utils.notes_utils import remove_tmp_file, save_tmp_stream
+from utils.text_utils import extract_note_text
+
+env = get_env_config()
+
+# section name in note["status"] -> stage that fills it
+STAGES = {
+    "goals": generate_roadmap_goals_background,
+    "puzzles": generate_puzzles_background,
+    "quizzes": generate_quizzes_background,
+}
+COMBINED_STAGES = {"combined": generate_combined_background}
+
+ingest_executor = BoundedExecutor("ingest", env.INGEST_WORKERS, env.GENERATION_QUEUE_SIZE)
+stage_executors = {
+    "goals": BoundedExecutor("goals", env.GOALS_WORKERS, env.GENERATION_QUEUE_SIZE),
+    "puzzles": BoundedExecutor("puzzles", env.PUZZLES_WORKERS, env.GENERATION_QUEUE_SIZE),
+    "quizzes": BoundedExecutor("quizzes", env.QUIZZES_WORKERS, env.GENERATION_QUEUE_SIZE),
+    "combined": BoundedExecutor("combined", env.COMBINED_WORKERS, env.GENERATION_QUEUE_SIZE),
+}
+
+class SharedNoteFile:
+    """Gemini file uploaded once per note, deleted when the last stage releases it.
+
+    genai_file is None when the note text was extracted locally or every stage is cached.
+    """
+
+    def __init__(self, genai_file, users, file_hash=None, text=None):
+        self.genai_file = genai_file
+        self.file_hash = file_hash
+        self.text = text
+        self._users = users
+        self._lock = threading.Lock()
+
+    @property
+    def content(self):
+        return self.text if self.text is not None else self.genai_file
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            last = self._users == 0
+
+        if last and self.genai_file is not None:
+            delete_file(self.genai_file.name)
+
+def get_active_stages():
+    return COMBINED_STAGES if env.GENERATION_COMBINED else STAGES
+
+def is_fully_cached(stages, file_hash):
+    return all(has_cached_output(file_hash, name) for name in stages)
+
+def ingest_note_background(file_path, file_hash, user_id, file_id):
+    stages = get_active_stages()
+    genai_file = None
+    text = None
+
+    try:
+        if not is_fully_cached(stages, file_hash):
+            text = extract_note_text(file_path)
+            genai_file = upload_file(file_path) if text is None else None
+    except Exception as error:
+        print(f"[E] failed to upload file to gemini: {error}")
+        for section in STAGES:
+            update_note_status(user_id, file_id, section, "failed")
+        return
+    finally:
+        remove_tmp_file(file_path)
+
+    note_file = SharedNoteFile(genai_file, len(stages), file_hash, text)
+
+    # a full stage queue fails its sections right away instead of parking this ingest thread until a slot frees up
+    for name, stage in stages.items():
+        try:
+            stage_executors[name].submit(with_gemini_context(name, user_id, stage), note_file, user_id, file_id)
+        except QueueFullError as error:
+            print(f"[E] {error}, note {file_id} skips {name}")
+            note_file.release()
+            for section in (STAGES if name in COMBINED_STAGES else [name]):
+                update_note_status(user_id, file_id, section, "failed")
+
+def start_note_generation(file_stream, file_ext, file_hash, user_id, file_id):
+    """Raises QueueFullError when the local ingest queue cannot take another note."""
+    file_stream.seek(0)
+
+    if env.GENERATION_BACKEND == "queue":
+        # picked up by worker.py
+        enqueue_job("ingest", user_id, file_id, {"file": Binary(file_stream.read()), "file_ext": file_ext, "file_hash": file_hash})
+        return
+
+    # one copy on disk shared by every stage, removed by ingest_note_background
+    file_path = save_tmp_stream(file_stream, file_ext)
+
+    try:
+        ingest_executor.submit(with_gemini_context("ingest", user_id, ingest_note_background), file_path, file_hash, user_id, file_id)
+    except QueueFullError:
+        remove_tmp_file(file_path)
+        raise
+
+def get_generation_stats():
+    stats = {"ingest": ingest_executor.stats()}
+
+    for section, executor in stage_executors.items():
+        stats[section] = executor.stats()
+
+    stats["cache"] = get_cache_stats()
+    stats["prompts"] = get_prompt_stats()
+    stats["gemini"] = get_gemini_stats()
+    stats["ledger"] = get_ledger_stats()
+    stats["mongo"] = get_pool_stats()
+
+    return stats
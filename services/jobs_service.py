@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+from config.env_config import get_env_config
+from database import get_jobs_collection
+
+env = get_env_config()
+
+def enqueue_job(kind, user_id, note_id, payload=None, parent_id=None):
+    now = datetime.now(timezone.utc)
+    job = {
+        "kind": kind,
+        "user_id": user_id,
+        "note_id": note_id,
+        "payload": payload or {},
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": env.JOB_MAX_ATTEMPTS,
+        "created_at": now,
+        "available_at": now,
+        "lease_owner": None,
+        "lease_expires_at": None,
+    }
+
+    if parent_id is None:
+        job["_id"] = ObjectId()
+        get_jobs_collection().insert_one(job)
+        return job["_id"]
+
+    # child jobs are keyed by (parent_id, kind) so a retried parent does not enqueue them twice
+    job["parent_id"] = parent_id
+    result = get_jobs_collection().find_one_and_update(
+            {"parent_id": parent_id, "kind": kind},
+            {"$setOnInsert": job},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+    )
+
+    return result["_id"]
+
+def claim_job(worker_id, kinds):
+    now = datetime.now(timezone.utc)
+
+    return get_jobs_collection().find_one_and_update(
+            {"status": "queued", "kind": {"$in": kinds}, "available_at": {"$lte": now}},
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=env.JOB_LEASE_SECONDS),
+                    "started_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+    )
+
+def heartbeat_job(job_id, worker_id):
+    """Extends the lease, returns False when the job was taken away from this worker."""
+    result = get_jobs_collection().update_one(
+            {"_id": job_id, "status": "running", "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=env.JOB_LEASE_SECONDS)}}
+    )
+
+    return result.modified_count == 1
+
+def complete_job(job_id, worker_id, fields=None):
+    update = {"status": "done", "finished_at": datetime.now(timezone.utc), "lease_owner": None, "lease_expires_at": None}
+    update.update(fields or {})
+
+    result = get_jobs_collection().update_one(
+            {"_id": job_id, "status": "running", "lease_owner": worker_id},
+            {"$set": update}
+    )
+
+    return result.modified_count == 1
+
+def fail_job(job, worker_id, error):
+    """Re-queues the job with backoff or marks it dead, returns the new status or None if the lease was lost."""
+    return _release_failed_job(job, {"status": "running", "lease_owner": worker_id}, error)
+
+def requeue_expired_jobs():
+    """Returns the jobs that ran out of attempts so the caller can settle them."""
+    now = datetime.now(timezone.utc)
+    expired = get_jobs_collection().find({"status": "running", "lease_expires_at": {"$lt": now}}).to_list()
+    dead_jobs = []
+
+    for job in expired:
+        status = _release_failed_job(job, {"status": "running", "lease_expires_at": {"$lt": now}}, "lease expired")
+
+        if status == "dead":
+            dead_jobs.append(job)
+
+    return dead_jobs
+
+def _release_failed_job(job, guard, error):
+    now = datetime.now(timezone.utc)
+
+    if job["attempts"] >= job["max_attempts"]:
+        update = {"status": "dead", "finished_at": now}
+    else:
+        delay = env.JOB_RETRY_DELAY_SECONDS * 2 ** (job["attempts"] - 1)
+        update = {"status": "queued", "available_at": now + timedelta(seconds=delay)}
+
+    update.update({"error": str(error), "lease_owner": None, "lease_expires_at": None})
+
+    result = get_jobs_collection().update_one({"_id": job["_id"], **guard}, {"$set": update})
+    if result.modified_count == 0:
+        return None
+
+    return update["status"]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+from utils.gemini_ledger import get_ledger_collection
+
+PERCENTILES = (50, 95, 99)
+MAX_SAMPLES = 100000
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def get_ledger_report(hours=24, stage=None):
+    """Calls, failures, latency percentiles, tokens and cost per (stage, op) over the last hours."""
+    match = {"ts": {"$gte": datetime.now(timezone.utc) - timedelta(hours=hours)}}
+    if stage:
+        match["stage"] = stage
+
+    groups = get_ledger_collection().aggregate([
+        {"$match": match},
+        {"$sort": {"_id": -1}},
+        {"$limit": MAX_SAMPLES},
+        {"$group": {
+            "_id": {"stage": "$stage", "op": "$op"},
+            "calls": {"$sum": 1},
+            "errors": {"$sum": {"$cond": [{"$eq": ["$outcome", "ok"]}, 0, 1]}},
+            "latencies": {"$push": "$latency_ms"},
+            "prompt_tokens": {"$sum": {"$ifNull": ["$prompt_tokens", 0]}},
+            "response_tokens": {"$sum": {"$ifNull": ["$response_tokens", 0]}},
+            "thoughts_tokens": {"$sum": {"$ifNull": ["$thoughts_tokens", 0]}},
+            "upload_bytes": {"$sum": {"$ifNull": ["$upload_bytes", 0]}},
+            "cost_usd": {"$sum": {"$ifNull": ["$cost_usd", 0]}},
+            "users": {"$addToSet": "$user"},
+        }},
+        {"$sort": {"cost_usd": -1}},
+    ])
+
+    report = []
+    for group in groups:
+        latencies = sorted(group.pop("latencies"))
+        key = group.pop("_id")
+        row = {**key, **group, "users": len(group["users"]), "cost_usd": round(group["cost_usd"], 4)}
+
+        for pct in PERCENTILES:
+            row[f"p{pct}_ms"] = percentile(latencies, pct)
+        row["avg_prompt_tokens"] = group["prompt_tokens"] // group["calls"]
+        row["avg_response_tokens"] = group["response_tokens"] // group["calls"]
+
+        report.append(row)
+
+    return report
+
+def get_top_users(hours=24, limit=10):
+    """Users ordered by estimated Gemini cost over the last hours."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+
+    return get_ledger_collection().aggregate([
+        {"$match": {"ts": {"$gte": since}, "user": {"$ne": None}}},
+        {"$group": {
+            "_id": "$user",
+            "calls": {"$sum": 1},
+            "tokens": {"$sum": {"$add": [{"$ifNull": ["$prompt_tokens", 0]}, {"$ifNull": ["$response_tokens", 0]}, {"$ifNull": ["$thoughts_tokens", 0]}]}},
+            "cost_usd": {"$sum": {"$ifNull": ["$cost_usd", 0]}},
+        }},
+        {"$sort": {"cost_usd": -1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "user": "$_id", "calls": 1, "tokens": 1, "cost_usd": 1}},
+    ]).to_list()
@@ -1,9 +1,104 @@
 from bson import ObjectId
-from database import get_users_collection
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from database import get_notes_collection, get_users_collection
+from utils.status_events import publish_status_change
 
 
+class DuplicateNoteError(Exception):
+    pass
+
 def update_note_status(user_id, note_id, section, status):
-    get_users_collection().find_one_and_update(
-        {"_id": ObjectId(user_id), "notes._id": ObjectId(note_id)},
-        {"$set": { f"notes.$.status.{section}": status }}
+    get_notes_collection().update_one(
+        {"_id": ObjectId(note_id), "user_id": user_id},
+        {"$set": { f"status.{section}": status }}
     )
+    publish_status_change(user_id)
+
+def get_note_statuses(user_id, note_ids=None):
+    """Returns {note_id: status} reading only the status of each note."""
+    query = {"user_id": user_id}
+
+    if note_ids is not None:
+        query["_id"] = {"$in": [ObjectId(note_id) for note_id in note_ids if ObjectId.is_valid(note_id)]}
+
+    notes = get_notes_collection().find(query, {"status": 1})
+
+    return {str(note["_id"]): note.get("status", {}) for note in notes}
+
+def is_generating(status):
+    return "generating" in status.values()
+
+def get_user_notes(user_id):
+    return get_notes_collection().find({"user_id": user_id}, {"user_id": 0}).sort("_id", 1).to_list()
+
+def get_user_note(user_id, note_id, projection=None):
+    return get_notes_collection().find_one({"_id": ObjectId(note_id), "user_id": user_id}, projection)
+
+def count_user_notes(user_id):
+    return get_notes_collection().count_documents({"user_id": user_id})
+
+def has_note_hash(user_id, file_hash):
+    return get_notes_collection().find_one({"user_id": user_id, "hash": file_hash}, {"_id": 1}) is not None
+
+def create_note(user_id, note):
+    """Raises DuplicateNoteError when the user already uploaded a file with the same hash."""
+    try:
+        get_notes_collection().insert_one({**note, "user_id": user_id})
+    except DuplicateKeyError:
+        raise DuplicateNoteError(note.get("hash"))
+
+def delete_user_note(user_id, note_id):
+    return get_notes_collection().delete_one({"_id": ObjectId(note_id), "user_id": user_id}).deleted_count == 1
+
+def discard_note(user_id, note_id, sections):
+    """Removes a note whose generation never started, its sections are failed when it cannot be removed."""
+    try:
+        delete_user_note(user_id, note_id)
+        return
+    except Exception as error:
+        print(f"[E] failed to remove note {note_id}: {error}")
+
+    for section in sections:
+        try:
+            update_note_status(user_id, note_id, section, "failed")
+        except Exception as error:
+            print(f"[E] failed to mark {section} of note {note_id} as failed: {error}")
+
+def get_note_filenames(user_id, note_ids):
+    """Returns {note_id: filename} for the given note ids of the user."""
+    oids = list({ObjectId(note_id) for note_id in note_ids if note_id and ObjectId.is_valid(note_id)})
+    if not oids:
+        return {}
+
+    notes = get_notes_collection().find({"user_id": user_id, "_id": {"$in": oids}}, {"filename": 1})
+
+    return {str(note["_id"]): note.get("filename") for note in notes}
+
+def migrate_embedded_notes(keep_embedded=False):
+    """Copies users.notes arrays into the notes collection, safe to run again.
+
+    Notes already copied are left untouched, the embedded array is removed once its notes are all in place.
+    """
+    report = {"users": 0, "copied": 0, "existing": 0}
+    users = get_users_collection().find({"notes.0": {"$exists": True}}, {"notes": 1})
+
+    for user in users:
+        user_id = str(user["_id"])
+        operations = [
+            UpdateOne({"_id": note["_id"]}, {"$setOnInsert": {**note, "user_id": user_id}}, upsert=True)
+            for note in user["notes"]
+            if "_id" in note
+        ]
+
+        if operations:
+            result = get_notes_collection().bulk_write(operations, ordered=False)
+            report["copied"] += result.upserted_count
+            report["existing"] += len(operations) - result.upserted_count
+
+        if not keep_embedded:
+            get_users_collection().update_one({"_id": user["_id"]}, {"$unset": {"notes": ""}})
+
+        report["users"] += 1
+
+    return report
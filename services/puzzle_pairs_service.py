@@ -1,105 +1,96 @@
-import json
 import time
 from bson import ObjectId
-from google import genai
-from config.env_config import get_env_config
+from pymongo import InsertOne, UpdateOne
 from constants.puzzles_pair_prompt import get_puzzles_prompt
-from database import get_puzzles_collection
+from database import bulk_write_atomic, get_puzzles_collection
+from models.puzzle_pairs import GeneratedPuzzle
+from services.context_service import build_context, record_prompt, puzzle_fingerprint
+from services.dedupe_service import find_duplicates, index_writes, signature_pairs
+from services.generation_cache_service import generate_once, get_cached_output
 from services.notes_service import update_note_status
-from utils.gemini_utils import parse_model_output
-from utils.notes_utils import remove_tmp_file, save_tmp_file
+from utils.gemini import generate
+from utils.gemini_utils import StructuredOutput, note_part
 
-env = get_env_config()
-genai_client = genai.Client(api_key=env.GENAI_API_KEY)
+
+PUZZLES_OUTPUT = StructuredOutput(list[GeneratedPuzzle])
 
 def get_previous_puzzles(user_id):
-    previous_puzzles = get_puzzles_collection().find({"user_id":user_id}, {"user_id": 0, "note_id": 0})
-    previous_puzzles = previous_puzzles.to_list()
+    """Returns (json of the newest puzzles that fit the prompt context budget, how many puzzles the user has)."""
+    return build_context(get_puzzles_collection(), user_id, {"pairs.left": 1}, puzzle_fingerprint)
 
-    return json.dumps(previous_puzzles, default=str)
+def request_puzzles(note_content, user_id):
+    previous_puzzles, previous_count = get_previous_puzzles(user_id)
+    print(f"Previous puzzles: {previous_count} total, sending {previous_puzzles}")
+    prompt = record_prompt("puzzles", get_puzzles_prompt(previous_puzzles, previous_count))
 
-def generate_puzzles(file, user_id, file_id):
-    previous_puzzles = get_previous_puzzles(user_id)
-    print("Previous puzzles: ", previous_puzzles)
-    prompt = get_puzzles_prompt(previous_puzzles)
+    return PUZZLES_OUTPUT.parse(generate(prompt, [note_part(note_content)], PUZZLES_OUTPUT))
 
-    try:
-        genai_file = genai_client.files.upload(file=file)
-    except Exception as error:
-        print(error)
-        return False, "[E] failed to upload file to gemini"
+def generate_puzzles(note_content, user_id, file_id, file_hash=None):
+    response_obj = get_cached_output(file_hash, "puzzles", user_id)
 
-    try:
-        contents = [
-                genai.types.Content(
-                    role="user",
-                    parts=[
-                        genai.types.Part(text=prompt),
-                        genai.types.Part(file_data=genai.types.FileData(file_uri=genai_file.uri))
-                    ]
-                )
-        ]
-
-        response = genai_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=contents
-        )
-    except Exception as error:
-        print(error)
-        return False, "[E] Failed to generate puzzles"
+    if response_obj is None:
+        try:
+            response_obj = generate_once(file_hash, "puzzles", user_id, lambda: request_puzzles(note_content, user_id))
+        except Exception as error:
+            print(error)
+            return False, "[E] Failed to generate puzzles"
 
     try:
-        if genai_file.name is not None:
-            genai_client.files.delete(name=genai_file.name)
-    except Exception as error:
-        print(f"[W] failed to delete file {error}")
-
-    try:
-        save_to_DB(response, file_id, user_id)
+        save_to_DB(response_obj, file_id, user_id)
     except Exception as error:
         print(error)
         return False, "[E] Failed to save to Database"
 
     return True, ""
 
-def save_to_DB(response, file_id, user_id):
-    try:
-        print("genai raw response ->", response.text)
-        response_obj = parse_model_output(response.text)
-        print("genai obj response ->", response_obj)
-    except json.JSONDecodeError:
-        raise ValueError("Could not parse JSON from model output")
+def save_to_DB(response_obj, file_id, user_id):
+    """Writes a stage's output and its dedupe entries in one transaction, returns the matched, modified and inserted counts."""
+    operations = []
+    indexed = signature_pairs("puzzles", [puzzle for puzzle in response_obj if "_id" in puzzle])
+    new_items = []
 
     for puzzle in response_obj:
         if "_id" in puzzle:
-            get_puzzles_collection().update_one(
+            operations.append(UpdateOne(
                     {"user_id": user_id, "_id": ObjectId(puzzle["_id"])},
                     {"$set": {
                         "pairs": puzzle["pairs"],
                         "note_id": file_id
                     }}
-            )
+            ))
         else:
-            puzzle["_id"] = ObjectId()
-            puzzle["user_id"] = user_id
+            puzzle["_id"] = ObjectId() # set before the lookup so repeats inside this batch point at it
+            new_items.append(puzzle)
+
+    for puzzle, (duplicate_id, signature) in zip(new_items, find_duplicates("puzzles", user_id, new_items)):
+        if duplicate_id is not None:
+            print(f"Skipping puzzle, near duplicate of {duplicate_id}")
+            continue
+
+        puzzle["user_id"] = user_id
+
+        if file_id is not None:
+            puzzle["note_id"] = file_id
+
+        operations.append(InsertOne(puzzle))
+        indexed.append((puzzle["_id"], signature))
 
-            if file_id is not None:
-                puzzle["note_id"] = file_id
+    counts = bulk_write_atomic(get_puzzles_collection(), operations, [index_writes("puzzles", user_id, indexed)])
+    print(f"Saved puzzles: {counts}")
 
-            get_puzzles_collection().insert_one(puzzle)
+    return counts
 
-def generate_puzzles_background(file_bytes, file_ext, user_id, file_id):
+def generate_puzzles_background(note_file, user_id, file_id):
     try:
-        puzzles_file = save_tmp_file(file_bytes, file_ext)
-        success, msg = generate_puzzles(puzzles_file, user_id, file_id)
-        #success, msg = test()
+        success, msg = generate_puzzles(note_file.content, user_id, file_id, note_file.file_hash)
+        # success, msg = test()
         print(msg)
         update_note_status(user_id, file_id, "puzzles", "done" if success else "failed")
     except Exception as e:
         print(f"[E] Puzzle generation failed: {e}")
         update_note_status(user_id, file_id, "puzzles", "failed")
-    else:
-        remove_tmp_file(puzzles_file)
+    finally:
+        note_file.release()
 
 def test():
     time.sleep(12)
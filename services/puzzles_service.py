@@ -1,14 +1,15 @@
 import os
-import json
 import uuid
 import mimetypes
 from datetime import datetime
 from werkzeug.utils import secure_filename
-import google.generativeai as genai
 from config.env_config import get_env_config
+from models.puzzle_model import GeneratedCrossword
+from utils.gemini import generate
+from utils.gemini_utils import StructuredOutput
+from utils.text_utils import estimate_tokens, extract_text, fit_to_budget
 
 env = get_env_config()
-genai.configure(api_key=env.GENAI_API_KEY)
 
 UPLOAD_FOLDER = 'temp_uploads'
 ALLOWED_EXTENSIONS = {'txt', 'pdf'}
@@ -16,6 +17,8 @@ MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+CROSSWORD_OUTPUT = StructuredOutput(GeneratedCrossword)
+
 def create_crossword_prompt():
     return """
 You are a crossword puzzle generator. Generate a crossword puzzle from the uploaded file content.
@@ -122,16 +125,13 @@ def validate_file(file):
 
 def extract_text_content(file_path, content_type):
     """Extract text from uploaded file"""
-    try:
-        if content_type == 'text/plain':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                return content.strip()
-        elif content_type == 'application/pdf':
-            return None
-    except Exception as e:
-        print(f"Error extracting text: {e}")
-        return None
+    file_ext = mimetypes.guess_extension(content_type or "") or os.path.splitext(file_path)[1]
+    text = extract_text(file_path, file_ext)
+
+    if text and estimate_tokens(text) > env.NOTE_TOKEN_BUDGET:
+        text = fit_to_budget(text, env.NOTE_TOKEN_BUDGET)
+
+    return text
 
 def validate_crossword_data(data):
     """Validate the structure of generated crossword data"""
@@ -192,19 +192,11 @@ def generate_crossword_puzzle(file):
         try:
             prompt = create_crossword_prompt()
             full_prompt = f"{prompt}\n\nFile content:\n{text_content}"
-            model = genai.GenerativeModel("gemini-2.5-flash")
-            response = model.generate_content(full_prompt)
-            
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
+            response = generate(full_prompt, schema=CROSSWORD_OUTPUT)
             
             try:
-                puzzle_data = json.loads(response_text)
-            except json.JSONDecodeError as e:
+                puzzle_data = CROSSWORD_OUTPUT.parse(response)
+            except ValueError as e:
                 return {"success": False, "error": f"AI returned invalid JSON: {str(e)}"}
             
             is_valid_puzzle, validation_message = validate_crossword_data(puzzle_data)
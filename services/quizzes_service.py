@@ -1,78 +1,57 @@
-import json
 import time
 from bson import ObjectId
-from google import genai
-from config.env_config import get_env_config
+from pymongo import InsertOne, UpdateOne
 from constants.quizzes_prompt import get_quizzes_prompt
-from database import get_quizzes_collection
+from database import bulk_write_atomic, get_quizzes_collection
+from models.quizzes import GeneratedQuiz
+from services.context_service import build_context, record_prompt, quiz_fingerprint
+from services.dedupe_service import find_duplicates, index_writes, signature_pairs
+from services.generation_cache_service import generate_once, get_cached_output
 from services.notes_service import update_note_status
-from utils.gemini_utils import parse_model_output
-from utils.notes_utils import remove_tmp_file, save_tmp_file
+from utils.gemini import generate
+from utils.gemini_utils import StructuredOutput, note_part
 
-env = get_env_config()
-genai_client = genai.Client(api_key=env.GENAI_API_KEY)
+
+QUIZZES_OUTPUT = StructuredOutput(list[GeneratedQuiz])
 
 def get_previous_quizzes(user_id):
-    previous_quizzes = get_quizzes_collection().find({"user_id":user_id}, {"brief": 0, "user_id": 0, "note_id": 0})
-    previous_quizzes = previous_quizzes.to_list()
+    """Returns (json of the newest quizzes that fit the prompt context budget, how many quizzes the user has)."""
+    return build_context(get_quizzes_collection(), user_id, {"question": 1}, quiz_fingerprint)
 
-    return json.dumps(previous_quizzes, default=str)
+def request_quizzes(note_content, user_id):
+    previous_quizzes, previous_count = get_previous_quizzes(user_id)
+    print(f"Previous quizzes: {previous_count} total, sending {previous_quizzes}")
+    prompt = record_prompt("quizzes", get_quizzes_prompt(previous_quizzes, previous_count))
 
-def generate_quizzes(file, user_id, file_id):
-    previous_quizzes = get_previous_quizzes(user_id)
-    print("Previous quizzes: ", previous_quizzes)
-    prompt = get_quizzes_prompt(previous_quizzes)
+    return QUIZZES_OUTPUT.parse(generate(prompt, [note_part(note_content)], QUIZZES_OUTPUT))
 
-    try:
-        genai_file = genai_client.files.upload(file=file)
-    except Exception as error:
-        print(error)
-        return False, "[E] failed to upload file to gemini"
+def generate_quizzes(note_content, user_id, file_id, file_hash=None):
+    response_obj = get_cached_output(file_hash, "quizzes", user_id)
 
-    try:
-        contents = [
-                genai.types.Content(
-                    role="user",
-                    parts=[
-                        genai.types.Part(text=prompt),
-                        genai.types.Part(file_data=genai.types.FileData(file_uri=genai_file.uri))
-                    ]
-                )
-        ]
-
-        response = genai_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=contents
-        )
-    except Exception as error:
-        print(error)
-        return False, "[E] Failed to generate quizzes"
+    if response_obj is None:
+        try:
+            response_obj = generate_once(file_hash, "quizzes", user_id, lambda: request_quizzes(note_content, user_id))
+        except Exception as error:
+            print(error)
+            return False, "[E] Failed to generate quizzes"
 
     try:
-        if genai_file.name is not None:
-            genai_client.files.delete(name=genai_file.name)
-    except Exception as error:
-        print(f"[W] failed to delete file {error}")
-
-    try:
-        save_to_DB(response, file_id, user_id)
+        save_to_DB(response_obj, file_id, user_id)
     except Exception as error:
         print(error)
         return False, "[E] Failed to save to Database"
 
     return True, ""
 
-def save_to_DB(response, file_id, user_id):
-    try:
-        print("genai raw response ->", response.text)
-        response_obj = parse_model_output(response.text)
-        print("genai obj response ->", response_obj)
-    except json.JSONDecodeError:
-        raise ValueError("Could not parse JSON from model output")
+def save_to_DB(response_obj, file_id, user_id):
+    """Writes a stage's output and its dedupe entries in one transaction, returns the matched, modified and inserted counts."""
+    operations = []
+    indexed = signature_pairs("quizzes", [quizz for quizz in response_obj if "_id" in quizz])
+    new_items = []
 
     for quizz in response_obj:
         if "_id" in quizz:
-            get_quizzes_collection().update_one(
+            operations.append(UpdateOne(
                     {"user_id": user_id, "_id": ObjectId(quizz["_id"])},
                     {"$set": {
                         "question": quizz["question"],
@@ -80,28 +59,40 @@ def save_to_DB(response, file_id, user_id):
                         "correct": quizz["options"][quizz["correct"]],
                         "note_id": file_id
                     }}
-            )
+            ))
         else:
-            quizz["_id"] = ObjectId()
-            quizz["user_id"] = user_id
+            quizz["_id"] = ObjectId() # set before the lookup so repeats inside this batch point at it
+            new_items.append(quizz)
+
+    for quizz, (duplicate_id, signature) in zip(new_items, find_duplicates("quizzes", user_id, new_items)):
+        if duplicate_id is not None:
+            print(f"Skipping quizz, near duplicate of {duplicate_id}")
+            continue
+
+        quizz["user_id"] = user_id
+
+        if file_id is not None:
+            quizz["note_id"] = file_id
+
+        operations.append(InsertOne(quizz))
+        indexed.append((quizz["_id"], signature))
 
-            if file_id is not None:
-                quizz["note_id"] = file_id
+    counts = bulk_write_atomic(get_quizzes_collection(), operations, [index_writes("quizzes", user_id, indexed)])
+    print(f"Saved quizzes: {counts}")
 
-            get_quizzes_collection().insert_one(quizz)
+    return counts
 
-def generate_quizzes_background(file_bytes, file_ext, user_id, file_id):
+def generate_quizzes_background(note_file, user_id, file_id):
     try:
-        quizzes_file = save_tmp_file(file_bytes, file_ext)
-        success, msg = generate_quizzes(quizzes_file, user_id, file_id)
-        #success, msg = test()
+        success, msg = generate_quizzes(note_file.content, user_id, file_id, note_file.file_hash)
+        # success, msg = test()
         print(msg)
         update_note_status(user_id, file_id, "quizzes", "done" if success else "failed")
     except Exception as e:
         print(f"[E] Quizz generation failed: {e}")
         update_note_status(user_id, file_id, "quizzes", "failed")
-    else:
-        remove_tmp_file(quizzes_file)
+    finally:
+        note_file.release()
 
 def test():
     time.sleep(12)
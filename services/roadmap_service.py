@@ -1,76 +1,48 @@
-import json
 import copy
 import time
-from google import genai
-from config.env_config import get_env_config
 from constants.roadmap_prompt import get_roadmap_prompt
 from controllers.goals_controller import create_user_goal, delete_user_goal_by_id
 from database import get_roadmap_goals_collection
+from models.roadmap_goal import GeneratedGoal
+from services.context_service import build_context, goal_fingerprint, record_prompt
+from services.generation_cache_service import generate_once, get_cached_output
 from services.notes_service import update_note_status
-from utils.gemini_utils import parse_model_output
-from utils.notes_utils import remove_tmp_file, save_tmp_file
+from utils.gemini import generate
+from utils.gemini_utils import StructuredOutput, note_part
 
-env = get_env_config()
-genai_client = genai.Client(api_key=env.GENAI_API_KEY)
+
+GOALS_OUTPUT = StructuredOutput(list[GeneratedGoal])
 
 def get_previous_goals(user_id):
-    previous_goals = get_roadmap_goals_collection().find({"user_id":user_id}, {"brief": 0, "user_id": 0, "note_id": 0})
-    previous_goals = previous_goals.to_list()
+    """Returns (json of the newest goals that fit the prompt context budget, how many goals the user has)."""
+    return build_context(get_roadmap_goals_collection(), user_id, {"brief": 0, "user_id": 0, "note_id": 0}, goal_fingerprint, sort_key=lambda goal: goal["order"] or 0)
 
-    return json.dumps(previous_goals, default=str)
+def request_goals(note_content, user_id):
+    previous_goals, previous_count = get_previous_goals(user_id)
+    print(f"Previous goals: {previous_count} total, sending {previous_goals}")
+    prompt = record_prompt("goals", get_roadmap_prompt(previous_goals, previous_count))
 
-def generate_roadmap_goals(file, user_id, file_id):
-    previous_goals = get_previous_goals(user_id)
-    print("Previous goals: ", previous_goals)
-    prompt = get_roadmap_prompt(previous_goals)
+    return GOALS_OUTPUT.parse(generate(prompt, [note_part(note_content)], GOALS_OUTPUT))
 
-    try:
-        genai_file = genai_client.files.upload(file=file)
-    except Exception as error:
-        print(error)
-        return False, "[E] failed to upload file to gemini"
+def generate_roadmap_goals(note_content, user_id, file_id, file_hash=None):
+    response_obj = get_cached_output(file_hash, "goals", user_id)
 
-    try:
-        contents = [
-                genai.types.Content(
-                    role="user",
-                    parts=[
-                        genai.types.Part(text=prompt),
-                        genai.types.Part(file_data=genai.types.FileData(file_uri=genai_file.uri))
-                    ]
-                )
-        ]
-
-        response = genai_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=contents
-        )
-    except Exception as error:
-        print(error)
-        return False, "[E] Failed to generate goals"
-
-    try:
-        if genai_file.name is not None:
-            genai_client.files.delete(name=genai_file.name)
-    except Exception as error:
-        print(f"[W] failed to delete file {error}")
+    if response_obj is None:
+        try:
+            response_obj = generate_once(file_hash, "goals", user_id, lambda: request_goals(note_content, user_id))
+        except Exception as error:
+            print(error)
+            return False, "[E] Failed to generate goals"
 
     try:
-        save_to_DB(response, file_id, user_id)
+        save_to_DB(response_obj, file_id, user_id)
     except Exception as error:
         print(error)
         return False, "[E] Failed to save to Database"
 
     return True, ""
 
-def save_to_DB(response, file_id, user_id):
-    try:
-        print("genai raw response ->", response.text)
-        response_obj = parse_model_output(response.text)
-        print("genai obj response ->", response_obj)
-    except json.JSONDecodeError:
-        raise ValueError("Could not parse JSON from model output")
-
+def save_to_DB(response_obj, file_id, user_id):
     for goal in response_obj:
         goal_copy = copy.deepcopy(goal)
         create_user_goal(user_id, goal_copy, file_id)
@@ -79,18 +51,17 @@ def save_to_DB(response, file_id, user_id):
             success, msg = delete_user_goal_by_id(goal["_id"], user_id)
             print(success, msg)
 
-def generate_roadmap_goals_background(file_bytes, file_ext, user_id, file_id):
+def generate_roadmap_goals_background(note_file, user_id, file_id):
     try:
-        goals_file = save_tmp_file(file_bytes, file_ext)
-        success, msg = generate_roadmap_goals(goals_file, user_id, file_id)
+        success, msg = generate_roadmap_goals(note_file.content, user_id, file_id, note_file.file_hash)
         # success, msg = test()
         print(msg)
         update_note_status(user_id, file_id, "goals", "done" if success else "failed")
     except Exception as e:
         print(f"[E] Goal generation failed: {e}")
         update_note_status(user_id, file_id, "goals", "failed")
-    else:
-        remove_tmp_file(goals_file)
+    finally:
+        note_file.release()
 
 def test():
     time.sleep(12)
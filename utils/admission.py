@@ -0,0 +1,147 @@
+import math
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from bson import ObjectId
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from pymongo import ReturnDocument
+from config.env_config import get_env_config
+from database import get_admission_collection
+
+env = get_env_config()
+
+# a crashed worker never releases its slot, so slots also expire on their own
+SLOT_TTL_SECONDS = 300
+BUSY_RETRY_AFTER_SECONDS = 5
+
+def _push_if_below(field, limit, entry, now):
+    """Update pipeline dropping expired entries of field and appending entry while below limit."""
+    return [
+        {"$set": {
+            field: {"$filter": {"input": {"$ifNull": [f"${field}", []]}, "cond": {"$gt": ["$$this.expires_at", now]}}},
+            "updated_at": now,
+        }},
+        {"$set": {
+            field: {"$cond": [
+                {"$lt": [{"$size": f"${field}"}, limit]},
+                {"$concatArrays": [f"${field}", [entry]]},
+                f"${field}",
+            ]},
+        }},
+    ]
+
+def acquire_slot(key, limit):
+    """Returns a token when a concurrency slot was taken, None when all of them are busy."""
+    now = datetime.now(timezone.utc)
+    token = str(ObjectId())
+    entry = {"token": token, "expires_at": now + timedelta(seconds=SLOT_TTL_SECONDS)}
+
+    doc = get_admission_collection().find_one_and_update(
+            {"_id": key},
+            _push_if_below("holders", limit, entry, now),
+            projection={"holders.token": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+    )
+
+    return token if any(holder["token"] == token for holder in doc["holders"]) else None
+
+def release_slot(key, token):
+    get_admission_collection().update_one({"_id": key}, {"$pull": {"holders": {"token": token}}})
+
+def hit_rate_limit(key, limit, window_seconds):
+    """Records a hit in the sliding window, returns seconds to wait or 0 when the hit was allowed."""
+    now = datetime.now(timezone.utc)
+    token = str(ObjectId())
+    entry = {"token": token, "expires_at": now + timedelta(seconds=window_seconds)}
+
+    doc = get_admission_collection().find_one_and_update(
+            {"_id": key},
+            _push_if_below("hits", limit, entry, now),
+            projection={"hits": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+    )
+
+    if any(hit["token"] == token for hit in doc["hits"]):
+        return 0
+
+    oldest = min(hit["expires_at"] for hit in doc["hits"])
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+
+    return max(1, math.ceil((oldest - now).total_seconds()))
+
+def too_many_requests(message, retry_after):
+    response = jsonify({"error": message})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
+
+def get_caller_key():
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        # guest routes must keep working for callers that send an expired or revoked token
+        identity = None
+
+    return f"user:{identity}" if identity else f"ip:{request.remote_addr}"
+
+def admission_control(name, user_concurrency=None, global_concurrency=None, rate_limit=None, rate_window_seconds=None):
+    """Per-caller and global concurrency plus a per-caller sliding window, shared by every worker through Mongo.
+
+    Place it below @jwt_required so the caller is known, guest routes are limited by IP.
+    """
+    user_concurrency = user_concurrency or env.ADMISSION_USER_CONCURRENCY
+    global_concurrency = global_concurrency or env.ADMISSION_GLOBAL_CONCURRENCY
+    rate_limit = rate_limit or env.ADMISSION_RATE_LIMIT
+    rate_window_seconds = rate_window_seconds or env.ADMISSION_RATE_WINDOW_SECONDS
+
+    def decorator(route):
+        @wraps(route)
+        def wrapper(*args, **kwargs):
+            caller = get_caller_key()
+            slots = []
+
+            try:
+                for key, limit in ((f"concurrency:{name}:{caller}", user_concurrency), (f"concurrency:{name}", global_concurrency)):
+                    token = acquire_slot(key, limit)
+                    if token is None:
+                        _release_all(slots)
+                        return too_many_requests("Too many requests in progress, try again later", BUSY_RETRY_AFTER_SECONDS)
+                    slots.append((key, token))
+
+                retry_after = hit_rate_limit(f"rate:{name}:{caller}", rate_limit, rate_window_seconds)
+                if retry_after:
+                    _release_all(slots)
+                    return too_many_requests("Rate limit exceeded, try again later", retry_after)
+            except Exception as error:
+                # the limiter must never take the API down with it
+                print(f"[W] admission control unavailable: {error}")
+                _release_all(slots)
+                return route(*args, **kwargs)
+
+            streaming = False
+            try:
+                response = route(*args, **kwargs)
+                # a streamed body is produced after the route returns, keep the slots until it is fully sent
+                streaming = getattr(response, "is_streamed", False)
+                if streaming:
+                    response.call_on_close(lambda: _release_all(slots))
+                return response
+            finally:
+                if not streaming:
+                    _release_all(slots)
+
+        return wrapper
+
+    return decorator
+
+def _release_all(slots):
+    for key, token in slots:
+        try:
+            release_slot(key, token)
+        except Exception as error:
+            print(f"[W] failed to release admission slot {key}: {error}")
@@ -0,0 +1,87 @@
+import threading
+from functools import wraps
+from bson import ObjectId
+from cachetools import TTLCache
+from flask import jsonify
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from config.env_config import get_env_config
+from database import get_users_collection
+
+env = get_env_config()
+
+USER_ID_CLAIM = "user_id"
+TOKEN_VERSION_CLAIM = "ver"
+
+# user key -> current token_version, None when the user no longer exists
+_versions = TTLCache(maxsize=env.TOKEN_VERSION_CACHE_SIZE, ttl=env.TOKEN_VERSION_CACHE_SECONDS)
+_versions_lock = threading.Lock()
+
+OPERATORS = {username.strip() for username in env.OPERATOR_USERNAMES.split(",") if username.strip()}
+
+def create_user_token(user):
+    """Access token of a user document, carries its _id and token_version next to the username identity."""
+    return create_access_token(
+            identity=user["username"],
+            additional_claims={USER_ID_CLAIM: str(user["_id"]), TOKEN_VERSION_CLAIM: user.get("token_version", 0)}
+    )
+
+def get_current_user_id():
+    """_id of the caller as a string, read from the token claims.
+
+    Tokens issued before the user_id claim existed fall back to one indexed lookup, returns None if the user is gone.
+    """
+    user_id = get_jwt().get(USER_ID_CLAIM)
+    if user_id:
+        return user_id
+
+    user = get_users_collection().find_one({"username": get_jwt_identity()}, {"_id": 1})
+    return str(user["_id"]) if user else None
+
+def _user_key(jwt_payload):
+    user_id = jwt_payload.get(USER_ID_CLAIM)
+    return f"id:{user_id}" if user_id else f"username:{jwt_payload.get('sub')}"
+
+def _load_token_version(jwt_payload):
+    user_id = jwt_payload.get(USER_ID_CLAIM)
+    query = {"_id": ObjectId(user_id)} if user_id else {"username": jwt_payload.get("sub")}
+    user = get_users_collection().find_one(query, {"token_version": 1})
+
+    return None if user is None else user.get("token_version", 0)
+
+def is_token_revoked(jwt_payload):
+    """True when the user was deleted or its token_version moved past the one in the token.
+
+    Versions are cached for TOKEN_VERSION_CACHE_SECONDS, so a revoked token may still work that long on other workers.
+    """
+    key = _user_key(jwt_payload)
+
+    with _versions_lock:
+        cached = _versions.get(key, False)
+
+    if cached is False:
+        cached = _load_token_version(jwt_payload)
+        with _versions_lock:
+            _versions[key] = cached
+
+    if cached is None:
+        return True
+
+    return jwt_payload.get(TOKEN_VERSION_CLAIM, 0) != cached
+
+def forget_token_version(user_id, username=None):
+    """Drops the cached version after a bump so this process rejects old tokens right away."""
+    with _versions_lock:
+        _versions.pop(f"id:{user_id}", None)
+        if username is not None:
+            _versions.pop(f"username:{username}", None)
+
+def operator_required(route):
+    """Limits a route to the OPERATOR_USERNAMES, place it below @jwt_required."""
+    @wraps(route)
+    def wrapper(*args, **kwargs):
+        if get_jwt_identity() not in OPERATORS:
+            return jsonify({"error": "Forbidden"}), 403
+
+        return route(*args, **kwargs)
+
+    return wrapper
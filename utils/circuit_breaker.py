@@ -0,0 +1,79 @@
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures, then lets one trial call through every reset_seconds."""
+
+    def __init__(self, name, failure_threshold, reset_seconds):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+
+            if state == "closed":
+                return
+
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return
+
+            self._rejected += 1
+
+        raise CircuitOpenError(f"{self.name} is unavailable, circuit is open")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_running:
+                    self._times_opened += 1
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def release_trial(self):
+        """Frees the half-open trial after a failure that says nothing about upstream health."""
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+            }
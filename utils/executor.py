@@ -0,0 +1,67 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    pass
+
+class BoundedExecutor:
+    """Thread pool that holds at most max_workers + max_queue jobs at a time."""
+
+    def __init__(self, name, max_workers, max_queue):
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def submit(self, fn, *args, block=False):
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self._rejected += 1
+            raise QueueFullError(f"{self.name} queue is full")
+
+        with self._lock:
+            self._queued += 1
+
+        queued_at = time.monotonic()
+
+        def run():
+            wait = time.monotonic() - queued_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                self._slots.release()
+
+        return self._pool.submit(run)
+
+    def stats(self):
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                "workers": self._max_workers,
+                "queue_size": self._max_queue,
+                "queue_depth": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": round(self._total_wait / started, 3) if started else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+            }
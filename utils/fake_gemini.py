@@ -0,0 +1,230 @@
+# offline stand-in for genai.Client: records live responses to a cassette directory and replays them
+
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import random
+import threading
+import time
+from google import genai
+from google.genai import errors
+from config.env_config import get_env_config
+
+env = get_env_config()
+
+STREAM_CHUNKS = 4
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+class Cassettes:
+    """One json file per request, grouped in a folder per response schema.
+
+    A request that was never recorded replays another recording of the same schema, so new notes still get a
+    response of the right shape on an offline machine.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        # uploaded file uri -> content hash, keeps keys stable when the same file gets a new uri
+        self.file_keys = {}
+        self._lock = threading.Lock()
+
+    def schema_key(self, config):
+        schema = getattr(config, "response_json_schema", None) if config is not None else None
+        if schema is None:
+            return "text"
+
+        return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:16]
+
+    def request_key(self, model, contents, config):
+        contents = [content.model_dump(mode="json", exclude_none=True) for content in contents]
+
+        for content in contents:
+            for part in content.get("parts", []):
+                file_data = part.get("file_data")
+                if file_data:
+                    file_data["file_uri"] = self.file_keys.get(file_data["file_uri"], file_data["file_uri"])
+
+        request = {"model": model, "contents": contents, "schema": self.schema_key(config)}
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+    def path(self, schema_key, request_key):
+        return os.path.join(self.directory, schema_key, f"{request_key}.json")
+
+    def load(self, model, contents, config):
+        schema_key = self.schema_key(config)
+        path = self.path(schema_key, self.request_key(model, contents, config))
+
+        if not os.path.exists(path):
+            folder = os.path.join(self.directory, schema_key)
+            recorded = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+            if not recorded:
+                raise FileNotFoundError(f"No recorded gemini response for schema {schema_key} in {self.directory}")
+            path = os.path.join(folder, recorded[int(os.path.basename(path)[:8], 16) % len(recorded)])
+
+        with open(path, encoding="utf-8") as file:
+            return genai.types.GenerateContentResponse.model_validate(json.load(file)["response"])
+
+    def save(self, model, contents, config, response):
+        path = self.path(self.schema_key(config), self.request_key(model, contents, config))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._lock, open(path, "w", encoding="utf-8") as file:
+            json.dump({"model": model, "response": response.model_dump(mode="json", exclude_none=True)}, file, indent=2)
+
+class FaultInjector:
+    def __init__(self, latency_ms, jitter_ms, error_rate, error_code, seed):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next_delay(self):
+        with self._lock:
+            return (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+
+    def next_error(self):
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+
+        if failed:
+            return errors.APIError(self.error_code, {"error": {"code": self.error_code, "message": "injected by fake gemini client", "status": "UNAVAILABLE"}})
+
+        return None
+
+    def apply(self):
+        time.sleep(self.next_delay())
+        error = self.next_error()
+        if error is not None:
+            raise error
+
+    async def apply_async(self):
+        await asyncio.sleep(self.next_delay())
+        error = self.next_error()
+        if error is not None:
+            raise error
+
+def split_response(response, chunks=STREAM_CHUNKS):
+    """Replays a response as streamed chunks, usage is only on the last one like the live API."""
+    text = response.text or ""
+    size = max(1, -(-len(text) // chunks))
+    pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    for index, piece in enumerate(pieces):
+        yield genai.types.GenerateContentResponse(
+                candidates=[genai.types.Candidate(content=genai.types.Content(role="model", parts=[genai.types.Part(text=piece)]))],
+                usage_metadata=response.usage_metadata if index == len(pieces) - 1 else None
+        )
+
+class FakeFiles:
+    def __init__(self, client):
+        self._client = client
+
+    def upload(self, file, **kwargs):
+        self._client.faults.apply()
+        digest = file_digest(file)
+
+        if self._client.live is not None:
+            uploaded = self._client.live.files.upload(file=file, **kwargs)
+            self._client.cassettes.file_keys[uploaded.uri] = f"file:{digest}"
+            return uploaded
+
+        uri = f"fake://files/{digest}"
+        self._client.cassettes.file_keys[uri] = f"file:{digest}"
+        mime_type, _ = mimetypes.guess_type(file)
+
+        return genai.types.File(name=f"files/{digest[:16]}", uri=uri, mime_type=mime_type or "application/octet-stream", size_bytes=os.path.getsize(file))
+
+    def delete(self, name, **kwargs):
+        if self._client.live is not None:
+            return self._client.live.files.delete(name=name, **kwargs)
+
+        return None
+
+class FakeModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        self._client.faults.apply()
+
+        if self._client.live is None:
+            return self._client.cassettes.load(model, contents, config)
+
+        response = self._client.live.models.generate_content(model=model, contents=contents, config=config)
+        self._client.cassettes.save(model, contents, config, response)
+        return response
+
+    def generate_content_stream(self, model, contents, config=None):
+        self._client.faults.apply()
+
+        if self._client.live is None:
+            response = self._client.cassettes.load(model, contents, config)
+            delay = self._client.faults.next_delay() / STREAM_CHUNKS
+            for chunk in split_response(response):
+                yield chunk
+                time.sleep(delay)
+            return
+
+        text = ""
+        last = None
+        for last in self._client.live.models.generate_content_stream(model=model, contents=contents, config=config):
+            text += last.text or ""
+            yield last
+
+        if last is not None:
+            recorded = genai.types.GenerateContentResponse(
+                    candidates=[genai.types.Candidate(content=genai.types.Content(role="model", parts=[genai.types.Part(text=text)]))],
+                    usage_metadata=last.usage_metadata
+            )
+            self._client.cassettes.save(model, contents, config, recorded)
+
+class FakeAsyncModels:
+    def __init__(self, client):
+        self._client = client
+
+    async def generate_content(self, model, contents, config=None):
+        await self._client.faults.apply_async()
+
+        if self._client.live is None:
+            return self._client.cassettes.load(model, contents, config)
+
+        response = await self._client.live.aio.models.generate_content(model=model, contents=contents, config=config)
+        self._client.cassettes.save(model, contents, config, response)
+        return response
+
+class FakeAsyncClient:
+    def __init__(self, client):
+        self.models = FakeAsyncModels(client)
+
+class FakeGeminiClient:
+    """Same files/models/aio surface as genai.Client.
+
+    live is the real client in record mode (responses are saved to the cassettes) and None in replay mode.
+    Latency and errors are injected in both modes.
+    """
+
+    def __init__(self, live=None):
+        self.live = live
+        self.cassettes = Cassettes(env.GEMINI_CASSETTE_DIR)
+        self.faults = FaultInjector(
+                env.GEMINI_FAKE_LATENCY_MS,
+                env.GEMINI_FAKE_LATENCY_JITTER_MS,
+                env.GEMINI_FAKE_ERROR_RATE,
+                env.GEMINI_FAKE_ERROR_CODE,
+                env.GEMINI_FAKE_SEED
+        )
+        self.files = FakeFiles(self)
+        self.models = FakeModels(self)
+        self.aio = FakeAsyncClient(self)
@@ -0,0 +1,228 @@
+# single Gemini client shared by every service and route
+
+import os
+import threading
+import time
+import httpx
+from google import genai
+from google.genai import errors
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from config.env_config import get_env_config
+from utils import gemini_ledger
+from utils.circuit_breaker import CircuitBreaker
+from utils.fake_gemini import FakeGeminiClient
+
+env = get_env_config()
+
+MODEL = "gemini-2.5-flash"
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+breaker = CircuitBreaker("gemini", env.GEMINI_BREAKER_THRESHOLD, env.GEMINI_BREAKER_RESET_SECONDS)
+_metrics_lock = threading.Lock()
+_metrics = {"calls": 0, "retries": 0, "failures": 0}
+
+def _http_options():
+    limits = httpx.Limits(
+        max_connections=env.GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=env.GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=env.GEMINI_KEEPALIVE_SECONDS,
+    )
+
+    return genai.types.HttpOptions(
+        timeout=env.GEMINI_TIMEOUT_SECONDS * 1000,
+        client_args={"limits": limits},
+        async_client_args={"limits": limits},
+    )
+
+def get_client():
+    """Created on first use in each process, so gunicorn workers never share a connection pool.
+
+    GEMINI_MODE=record|replay swaps in the cassette client of utils/fake_gemini.
+    """
+    global _client, _client_pid
+
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            if env.GEMINI_MODE == "replay":
+                _client = FakeGeminiClient()
+            elif env.GEMINI_MODE == "record":
+                _client = FakeGeminiClient(genai.Client(api_key=env.GENAI_API_KEY, http_options=_http_options()))
+            else:
+                _client = genai.Client(api_key=env.GENAI_API_KEY, http_options=_http_options())
+            _client_pid = os.getpid()
+
+    return _client
+
+def is_retryable(error):
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+def _count(metric):
+    with _metrics_lock:
+        _metrics[metric] += 1
+
+def _before_sleep(retry_state):
+    _count("retries")
+    print(f"[W] gemini call failed, retrying ({retry_state.attempt_number}): {retry_state.outcome.exception()}")
+
+def _retry_policy():
+    return {
+        "stop": stop_after_attempt(env.GEMINI_MAX_ATTEMPTS),
+        "wait": wait_exponential_jitter(initial=env.GEMINI_BACKOFF_INITIAL_SECONDS, max=env.GEMINI_BACKOFF_MAX_SECONDS),
+        "retry": retry_if_exception(is_retryable),
+        "before_sleep": _before_sleep,
+        "reraise": True,
+    }
+
+def _record_outcome(error):
+    if error is None:
+        breaker.record_success()
+    elif is_retryable(error):
+        breaker.record_failure()
+    else:
+        breaker.release_trial()
+
+def call_with_resilience(fn, *args, **kwargs):
+    """Retries transient Gemini errors with jittered backoff and fails fast with CircuitOpenError while upstream is down."""
+    _count("calls")
+
+    def attempt():
+        breaker.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as error:
+            _record_outcome(error)
+            raise
+        _record_outcome(None)
+        return result
+
+    try:
+        return Retrying(**_retry_policy())(attempt)
+    except Exception:
+        _count("failures")
+        raise
+
+async def call_with_resilience_async(fn, *args, **kwargs):
+    _count("calls")
+
+    async def attempt():
+        breaker.before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as error:
+            _record_outcome(error)
+            raise
+        _record_outcome(None)
+        return result
+
+    try:
+        return await AsyncRetrying(**_retry_policy())(attempt)
+    except Exception:
+        _count("failures")
+        raise
+
+def get_gemini_stats():
+    with _metrics_lock:
+        stats = dict(_metrics)
+
+    stats["breaker"] = breaker.stats()
+
+    return stats
+
+def build_contents(prompt, parts=None):
+    return [
+        genai.types.Content(
+            role="user",
+            parts=[genai.types.Part(text=prompt), *(parts or [])]
+        )
+    ]
+
+def build_config(schema=None):
+    if schema is None:
+        return None
+
+    return genai.types.GenerateContentConfig(response_mime_type="application/json", response_json_schema=schema.json_schema)
+
+def generate(prompt, parts=None, schema=None, model=MODEL):
+    return gemini_ledger.tracked("generate", model, lambda: call_with_resilience(
+            get_client().models.generate_content,
+            model=model,
+            contents=build_contents(prompt, parts),
+            config=build_config(schema)
+    ))
+
+def generate_stream(prompt, parts=None, schema=None, model=MODEL):
+    """Yields response chunks as they arrive.
+
+    Only opening the stream (up to the first chunk) is retried and counted by the breaker, chunks already handed out can't be taken back.
+    """
+    context = gemini_ledger.current_context()
+    started = time.perf_counter()
+    first_chunk_ms = None
+    last = None
+    error = None
+
+    def open_stream():
+        stream = get_client().models.generate_content_stream(
+                model=model,
+                contents=build_contents(prompt, parts),
+                config=build_config(schema)
+        )
+        return stream, next(stream, None)
+
+    try:
+        stream, last = call_with_resilience(open_stream)
+        first_chunk_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if last is not None:
+            yield last
+            for last in stream:
+                yield last
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        # usage is reported on the last chunk, a stream closed early has none
+        gemini_ledger.record("generate_stream", model, context, started, response=last, error=error, first_chunk_ms=first_chunk_ms)
+
+async def generate_async(prompt, parts=None, schema=None, model=MODEL):
+    context = gemini_ledger.current_context()
+    started = time.perf_counter()
+
+    try:
+        response = await call_with_resilience_async(
+                get_client().aio.models.generate_content,
+                model=model,
+                contents=build_contents(prompt, parts),
+                config=build_config(schema)
+        )
+    except Exception as error:
+        gemini_ledger.record("generate", model, context, started, error=error)
+        raise
+
+    gemini_ledger.record("generate", model, context, started, response=response)
+    return response
+
+def upload_file(file_path):
+    return gemini_ledger.tracked(
+            "upload", None,
+            lambda: call_with_resilience(get_client().files.upload, file=file_path),
+            upload_bytes=os.path.getsize(file_path)
+    )
+
+def delete_file(name):
+    try:
+        if name is not None:
+            gemini_ledger.tracked("delete", None, lambda: get_client().files.delete(name=name))
+    except Exception as error:
+        print(f"[W] failed to delete file {error}")
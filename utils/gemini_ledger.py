@@ -0,0 +1,192 @@
+# per-call record of every Gemini request: who asked, how long it took, how many tokens it burned
+
+import contextlib
+import contextvars
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pymongo.errors import CollectionInvalid
+from config.env_config import get_env_config
+from constants.collections import Collection
+from database import get_db
+
+env = get_env_config()
+
+# USD per million tokens (input, output), thinking tokens are billed as output
+PRICES_PER_MILLION = {
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+BATCH_SIZE = 100
+FLUSH_SECONDS = 2
+
+_context = contextvars.ContextVar("gemini_call_context", default=None)
+
+_queue = queue.Queue(maxsize=env.GEMINI_LEDGER_QUEUE_SIZE)
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"recorded": 0, "written": 0, "dropped": 0, "write_errors": 0}
+
+@contextlib.contextmanager
+def gemini_context(stage, user=None):
+    """Tags the Gemini calls made inside the block, needed in background threads where there is no request to read it from."""
+    token = _context.set({"stage": stage, "user": user})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+def with_gemini_context(stage, user, fn):
+    """fn wrapped to run inside gemini_context, for work handed to executor threads."""
+    def run(*args, **kwargs):
+        with gemini_context(stage, user):
+            return fn(*args, **kwargs)
+
+    return run
+
+def current_context():
+    context = _context.get()
+    if context is not None:
+        return context
+
+    try:
+        from flask import has_request_context, request
+        from flask_jwt_extended import get_jwt_identity
+
+        if has_request_context():
+            try:
+                user = get_jwt_identity()
+            except Exception:
+                user = None
+            return {"stage": request.endpoint or request.path, "user": user or request.remote_addr}
+    except ImportError:
+        pass
+
+    return {"stage": "unknown", "user": None}
+
+def usage_fields(response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+
+    return {
+        "prompt_tokens": usage.prompt_token_count or 0,
+        "response_tokens": usage.candidates_token_count or 0,
+        "thoughts_tokens": usage.thoughts_token_count or 0,
+        "cached_tokens": usage.cached_content_token_count or 0,
+    }
+
+def estimate_cost(model, fields):
+    input_price, output_price = PRICES_PER_MILLION.get(model, (0, 0))
+    output_tokens = fields.get("response_tokens", 0) + fields.get("thoughts_tokens", 0)
+
+    return (fields.get("prompt_tokens", 0) * input_price + output_tokens * output_price) / 1_000_000
+
+def outcome_of(error):
+    if error is None:
+        return "ok"
+
+    code = getattr(error, "code", None)
+    return f"error:{code}" if code else f"error:{type(error).__name__}"
+
+def record(op, model, context, started, response=None, error=None, **extra):
+    """Queues one ledger entry, never blocks the caller, entries are dropped when the writer can't keep up."""
+    if not env.GEMINI_LEDGER_ENABLED:
+        return
+
+    fields = usage_fields(response)
+    entry = {
+        "ts": datetime.now(timezone.utc),
+        "op": op,
+        "stage": context["stage"],
+        "user": None if context["user"] is None else str(context["user"]),
+        "model": model,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "outcome": outcome_of(error),
+        "cost_usd": estimate_cost(model, fields),
+        "pid": os.getpid(),
+        **fields,
+        **{key: value for key, value in extra.items() if value is not None},
+    }
+
+    _ensure_writer()
+    try:
+        _queue.put_nowait(entry)
+        _count("recorded")
+    except queue.Full:
+        _count("dropped")
+
+def tracked(op, model, call, **extra):
+    """Runs call() and records its latency, usage and outcome."""
+    context = current_context()
+    started = time.perf_counter()
+
+    try:
+        response = call()
+    except Exception as error:
+        record(op, model, context, started, error=error, **extra)
+        raise
+
+    record(op, model, context, started, response=response, **extra)
+    return response
+
+def _count(metric, amount=1):
+    with _stats_lock:
+        _stats[metric] += amount
+
+def _ensure_writer():
+    global _writer, _writer_pid
+
+    if _writer is not None and _writer_pid == os.getpid():
+        return
+
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = threading.Thread(target=_write_loop, name="gemini-ledger", daemon=True)
+            _writer.start()
+            _writer_pid = os.getpid()
+
+def get_ledger_collection():
+    db = get_db()
+    name = Collection.GEMINI_LEDGER.value
+
+    try:
+        db.create_collection(name, capped=True, size=env.GEMINI_LEDGER_BYTES)
+    except CollectionInvalid:
+        pass # already there
+
+    return db[name]
+
+def _write_loop():
+    collection = None
+
+    while True:
+        batch = [_queue.get()]
+        deadline = time.monotonic() + FLUSH_SECONDS
+
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(_queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+
+        try:
+            if collection is None:
+                collection = get_ledger_collection()
+            collection.insert_many(batch, ordered=False)
+            _count("written", len(batch))
+        except Exception as error:
+            _count("write_errors")
+            print(f"[W] failed to write {len(batch)} gemini ledger entries: {error}")
+
+def get_ledger_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+
+    stats["queued"] = _queue.qsize()
+
+    return stats
@@ -1,13 +1,68 @@
-import re
 import json
+from google import genai
+from pydantic import TypeAdapter, ValidationError
 
 
-def parse_model_output(text: str):
-    text = re.sub(r"^```(?:json)?\n", "", text)
-    text = re.sub(r"\n```$", "", text)
-    text = text.strip()
+class StructuredOutput:
+    """JSON schema sent to Gemini plus the compiled validator for its response."""
 
-    json_start = min([i for i in (text.find("["), text.find("{")) if i != -1])
-    json_text = text[json_start:]
+    def __init__(self, output_type):
+        self.adapter = TypeAdapter(output_type)
+        self.json_schema = self.adapter.json_schema(by_alias=True)
 
-    return json.loads(json_text)
+    def parse(self, response):
+        """Validates the raw response text once, returns plain dicts keyed like the prompt (_id, not id)."""
+        try:
+            parsed = self.adapter.validate_json(response.text or "")
+        except ValidationError as error:
+            print("genai raw response ->", response.text)
+            raise ValueError(f"Model output does not match schema: {error.error_count()} errors") from error
+
+        return self.adapter.dump_python(parsed, mode="json", by_alias=True, exclude_none=True)
+
+    def validate(self, obj):
+        """Same as parse for an already decoded object, raises ValidationError."""
+        return self.adapter.dump_python(self.adapter.validate_python(obj), mode="json", by_alias=True, exclude_none=True)
+
+def iter_array_items(chunks):
+    """Yields each top level element of a streamed JSON array as soon as its closing brace arrives."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    for chunk in chunks:
+        buffer += chunk.text or ""
+        pos = 0
+
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                pos += 1
+
+            if pos == len(buffer):
+                break
+
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Model output is not a JSON array")
+                started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == "]":
+                return
+
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break # element still incomplete, wait for the next chunk
+
+            yield item
+
+        buffer = buffer[pos:]
+
+def note_part(note_content):
+    """note_content is either the extracted note text or an uploaded Gemini file."""
+    if isinstance(note_content, str):
+        return genai.types.Part(text=f"new_file:\n{note_content}")
+
+    return genai.types.Part(file_data=genai.types.FileData(file_uri=note_content.uri))
@@ -0,0 +1,49 @@
+import hashlib
+import random
+import re
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS # 16 bands of 4 rows match pairs above ~0.5 jaccard most of the time
+SHINGLE_WORDS = 2
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# fixed seed, signatures are persisted so the permutations must never change between processes
+_rng = random.Random(1337)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_WORD_RE = re.compile(r"\w+")
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Lowercased word n-grams, a text shorter than size words is one shingle."""
+    words = _WORD_RE.findall(text.lower())
+
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "big")
+
+def signature(text):
+    """MinHash signature of the text as NUM_PERM ints, None when the text has no words."""
+    hashes = [_hash(shingle) for shingle in shingles(text)]
+
+    if not hashes:
+        return None
+
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+def band_keys(sig):
+    """LSH buckets of a signature, two texts sharing any key are near-duplicate candidates."""
+    return [
+        f"{band}:" + hashlib.blake2b(str(sig[band * ROWS:(band + 1) * ROWS]).encode(), digest_size=8).hexdigest()
+        for band in range(BANDS)
+    ]
+
+def similarity(sig_a, sig_b):
+    """Estimated jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
@@ -0,0 +1,88 @@
+import threading
+import time
+from pymongo import monitoring
+from pymongo.monitoring import ConnectionCheckOutFailedReason
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool checkouts, time spent waiting for a connection and wait queue timeouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting_since = threading.local()
+        self._stats = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "checkout_failures": 0,
+            "wait_queue_timeouts": 0,
+            "pool_clears": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    def _count(self, metric, amount=1):
+        with self._lock:
+            self._stats[metric] += amount
+
+    def _stop_waiting(self):
+        started = getattr(self._waiting_since, "value", None)
+        self._waiting_since.value = None
+
+        return None if started is None else (time.perf_counter() - started) * 1000
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("pool_clears")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("connections_closed")
+
+    def connection_check_out_started(self, event):
+        self._waiting_since.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._stop_waiting()
+        self._count("checkout_failures")
+
+        if event.reason == ConnectionCheckOutFailedReason.TIMEOUT:
+            self._count("wait_queue_timeouts")
+
+    def connection_checked_out(self, event):
+        wait_ms = self._stop_waiting()
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            if wait_ms is not None:
+                self._stats["total_wait_ms"] += wait_ms
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+
+    def connection_checked_in(self, event):
+        self._count("checkins")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats["in_use"] = stats["checkouts"] - stats["checkins"]
+        stats["open_connections"] = stats["connections_created"] - stats["connections_closed"]
+        stats["avg_wait_ms"] = round(stats["total_wait_ms"] / stats["checkouts"], 3) if stats["checkouts"] else 0
+        stats["total_wait_ms"] = round(stats["total_wait_ms"], 1)
+        stats["max_wait_ms"] = round(stats["max_wait_ms"], 1)
+
+        return stats
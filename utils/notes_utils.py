@@ -1,5 +1,44 @@
+import hashlib
 import os
+import shutil
 import tempfile
+from flask import Request
+from config.env_config import get_env_config
+
+env = get_env_config()
+
+class HashingSpooledFile(tempfile.SpooledTemporaryFile):
+    """Upload buffer that hashes the body while werkzeug writes it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return super().write(data)
+
+class SpooledRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingSpooledFile(max_size=env.UPLOAD_SPOOL_MEMORY_BYTES, mode="rb+")
+
+def get_upload_hash(file):
+    sha256 = getattr(file.stream, "sha256", None)
+    if sha256 is not None:
+        return sha256.hexdigest()
+
+    sha256 = hashlib.sha256()
+    for chunk in iter(lambda: file.stream.read(64 * 1024), b""):
+        sha256.update(chunk)
+    file.stream.seek(0)
+
+    return sha256.hexdigest()
+
+def save_tmp_stream(stream, ext):
+    stream.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+        shutil.copyfileobj(stream, tmp)
+        return tmp.name
 
 def save_tmp_file(file_bytes, ext):
     with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
@@ -7,4 +46,7 @@ def save_tmp_file(file_bytes, ext):
         return tmp.name
 
 def remove_tmp_file(file_name):
-    os.remove(file_name)
+    try:
+        os.remove(file_name)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,28 @@
+import threading
+import time
+from cachetools import TTLCache
+
+
+class TokenBucketLimiter:
+    """In-process token bucket per key, idle keys are forgotten once their bucket would be full again."""
+
+    def __init__(self, capacity, refill_seconds, max_keys=10000):
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+        self._buckets = TTLCache(maxsize=max_keys, ttl=capacity * refill_seconds)
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) / self.refill_seconds)
+
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return False, int((1 - tokens) * self.refill_seconds) + 1
+
+            self._buckets[key] = (tokens - 1, now)
+            return True, 0
@@ -0,0 +1,50 @@
+import json
+import threading
+from cachetools import TTLCache
+
+
+def json_size(value):
+    return len(json.dumps(value, default=str))
+
+class ResponseCache:
+    """Thread-safe TTL/LRU cache bounded both by entry count and by JSON size in bytes."""
+
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._cache = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=json_size)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._cache.get(key)
+
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+            return value
+
+    def set(self, key, value):
+        if json_size(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._cache[key] = value
+
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._cache),
+                "bytes": self._cache.currsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,20 @@
+import threading
+
+# in-process wake-ups for status streams, updates from other processes are picked up by polling
+_condition = threading.Condition()
+_versions = {}
+
+def publish_status_change(user_id):
+    with _condition:
+        _versions[user_id] = _versions.get(user_id, 0) + 1
+        _condition.notify_all()
+
+def get_status_version(user_id):
+    with _condition:
+        return _versions.get(user_id, 0)
+
+def wait_for_status_change(user_id, version, timeout):
+    """Returns the latest version, which equals version when nothing changed before the timeout."""
+    with _condition:
+        _condition.wait_for(lambda: _versions.get(user_id, 0) != version, timeout=timeout)
+        return _versions.get(user_id, 0)
@@ -0,0 +1,83 @@
+import os
+import re
+from pypdf import PdfReader
+from config.env_config import get_env_config
+
+env = get_env_config()
+
+TEXT_EXTENSIONS = {".txt", ".md"}
+CHARS_PER_TOKEN = 4
+# scanned PDFs have no text layer, anything shorter is sent to Gemini as a file instead
+MIN_TEXT_CHARS = 200
+
+def normalize_whitespace(text):
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t\f\v\u00a0]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+
+    return text.strip()
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def chunk_text(text, max_tokens):
+    """Splits text on paragraph boundaries into chunks of at most max_tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = ""
+
+    for paragraph in text.split("\n\n"):
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+def fit_to_budget(text, max_tokens):
+    chunks = chunk_text(text, max_tokens)
+    return chunks[0] if chunks else ""
+
+def extract_text(file_path, file_ext):
+    file_ext = file_ext.lower()
+
+    try:
+        if file_ext in TEXT_EXTENSIONS:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                return normalize_whitespace(f.read())
+
+        if file_ext == ".pdf":
+            reader = PdfReader(file_path)
+            return normalize_whitespace("\n\n".join(page.extract_text() or "" for page in reader.pages))
+    except Exception as error:
+        print(f"[W] failed to extract text from {file_ext} file: {error}")
+
+    return None
+
+def extract_note_text(file_path):
+    """Returns the note text trimmed to NOTE_TOKEN_BUDGET, or None when Gemini has to read the file itself."""
+    if not env.LOCAL_TEXT_EXTRACTION:
+        return None
+
+    text = extract_text(file_path, os.path.splitext(file_path)[1])
+    if not text or len(text) < MIN_TEXT_CHARS:
+        return None
+
+    tokens = estimate_tokens(text)
+    if tokens > env.NOTE_TOKEN_BUDGET:
+        print(f"[W] note has ~{tokens} tokens, keeping the first {env.NOTE_TOKEN_BUDGET}")
+        text = fit_to_budget(text, env.NOTE_TOKEN_BUDGET)
+
+    return text
@@ -0,0 +1,206 @@
+# standalone generation worker: python -m worker [--kinds goals,quizzes] [--concurrency 2]
+
+import argparse
+import os
+import signal
+import socket
+import threading
+from google import genai
+from pymongo import ReturnDocument
+from config.env_config import get_env_config
+from database import get_jobs_collection
+from services.combined_service import generate_combined
+from services.ingest_service import STAGES, get_active_stages, is_fully_cached
+from services.jobs_service import claim_job, complete_job, enqueue_job, fail_job, heartbeat_job, requeue_expired_jobs
+from services.notes_service import update_note_status
+from services.puzzle_pairs_service import generate_puzzles
+from services.quizzes_service import generate_quizzes
+from services.roadmap_service import generate_roadmap_goals
+from utils.gemini import delete_file, upload_file
+from utils.gemini_ledger import gemini_context
+from utils.notes_utils import remove_tmp_file, save_tmp_file
+from utils.text_utils import extract_note_text
+
+env = get_env_config()
+
+POLL_SECONDS = 2
+SWEEP_SECONDS = 30
+
+STAGE_GENERATORS = {
+    "goals": generate_roadmap_goals,
+    "puzzles": generate_puzzles,
+    "quizzes": generate_quizzes,
+}
+
+def run_ingest(job):
+    payload = job["payload"]
+
+    if "file" not in payload:
+        # a previous attempt enqueued every stage before dropping the bytes
+        return
+
+    file_hash = payload.get("file_hash")
+    stages = get_active_stages()
+    prepared = "refs" in job # a previous attempt already uploaded the file and counted the stages
+    file_info = job.get("genai_file")
+    text = None
+
+    if file_info is None and not is_fully_cached(stages, file_hash):
+        file_path = save_tmp_file(bytes(payload["file"]), payload["file_ext"])
+
+        try:
+            text = extract_note_text(file_path)
+            if text is None and not prepared:
+                genai_file = upload_file(file_path)
+                file_info = {"name": genai_file.name, "uri": genai_file.uri, "mime_type": genai_file.mime_type}
+        finally:
+            remove_tmp_file(file_path)
+
+    if not prepared:
+        # refs counts the stage jobs still using the uploaded file, set once before they exist so a retry
+        # does not undo what finished stages already released
+        get_jobs_collection().update_one(
+                {"_id": job["_id"], "refs": {"$exists": False}},
+                {"$set": {"refs": len(stages), "genai_file": file_info}}
+        )
+
+    for kind in stages:
+        enqueue_job(kind, job["user_id"], job["note_id"], {"genai_file": file_info, "text": text, "file_hash": file_hash}, parent_id=job["_id"])
+
+    # the bytes are only dropped once every stage job exists, a retry before this can still read them
+    get_jobs_collection().update_one({"_id": job["_id"]}, {"$unset": {"payload.file": ""}})
+
+def run_stage(job):
+    payload = job["payload"]
+    note_content = payload.get("text")
+
+    if note_content is None and payload.get("genai_file"):
+        note_content = genai.types.File(**payload["genai_file"])
+
+    if job["kind"] == "combined":
+        run_combined(note_content, payload.get("file_hash"), job["user_id"], job["note_id"])
+        return
+
+    success, msg = STAGE_GENERATORS[job["kind"]](note_content, job["user_id"], job["note_id"], payload.get("file_hash"))
+
+    if not success:
+        raise RuntimeError(msg)
+
+def run_combined(note_content, file_hash, user_id, note_id):
+    results = generate_combined(note_content, user_id, note_id, file_hash)
+
+    # only a failed model call is retried, partially saved output is kept as is
+    if not any(success for success, _ in results.values()):
+        raise RuntimeError(next(iter(results.values()))[1])
+
+    for section, (success, msg) in results.items():
+        print(msg)
+        update_note_status(user_id, note_id, section, "done" if success else "failed")
+
+def release_note_file(ingest_job_id):
+    ingest_job = get_jobs_collection().find_one_and_update(
+            {"_id": ingest_job_id},
+            {"$inc": {"refs": -1}},
+            return_document=ReturnDocument.AFTER
+    )
+
+    if not ingest_job or ingest_job.get("refs") != 0 or not ingest_job.get("genai_file"):
+        return
+
+    delete_file(ingest_job["genai_file"]["name"])
+
+def settle_job(job, status):
+    """Updates the note once a job reaches a terminal status."""
+    if job["kind"] == "ingest":
+        if status == "dead":
+            for section in STAGES:
+                update_note_status(job["user_id"], job["note_id"], section, "failed")
+        return
+
+    if job["kind"] == "combined":
+        if status == "dead":
+            for section in STAGES:
+                update_note_status(job["user_id"], job["note_id"], section, "failed")
+    else:
+        update_note_status(job["user_id"], job["note_id"], job["kind"], "done" if status == "done" else "failed")
+
+    release_note_file(job["parent_id"])
+
+def heartbeat(job, worker_id, finished):
+    while not finished.wait(env.JOB_LEASE_SECONDS / 3):
+        if not heartbeat_job(job["_id"], worker_id):
+            print(f"[W] lost lease on job {job['_id']}")
+            return
+
+def process_job(job, worker_id):
+    finished = threading.Event()
+    threading.Thread(target=heartbeat, args=(job, worker_id, finished), daemon=True).start()
+
+    try:
+        if job["kind"] == "ingest":
+            run_ingest(job)
+        else:
+            run_stage(job)
+    except Exception as error:
+        print(f"[E] job {job['_id']} ({job['kind']}) failed: {error}")
+        status = fail_job(job, worker_id, error)
+    else:
+        status = "done" if complete_job(job["_id"], worker_id) else None
+    finally:
+        finished.set()
+
+    if status in ("done", "dead"):
+        settle_job(job, status)
+
+def work(worker_id, kinds, stop):
+    while not stop.is_set():
+        try:
+            job = claim_job(worker_id, kinds)
+        except Exception as error:
+            print(f"[E] failed to claim job: {error}")
+            job = None
+
+        if job is None:
+            stop.wait(POLL_SECONDS)
+            continue
+
+        with gemini_context(job["kind"], job["user_id"]):
+            process_job(job, worker_id)
+
+def sweep(stop):
+    while not stop.wait(SWEEP_SECONDS):
+        try:
+            for job in requeue_expired_jobs():
+                settle_job(job, "dead")
+        except Exception as error:
+            print(f"[E] failed to sweep expired jobs: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run note generation jobs")
+    parser.add_argument("--kinds", default=",".join(["ingest", *STAGES, "combined"]), help="Comma separated job kinds to claim")
+    parser.add_argument("--concurrency", type=int, default=2, help="Jobs processed at the same time")
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    threads = [threading.Thread(target=sweep, args=(stop,), daemon=True)]
+    for i in range(args.concurrency):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{i}"
+        threads.append(threading.Thread(target=work, args=(worker_id, kinds, stop)))
+
+    for thread in threads:
+        thread.start()
+
+    print(f"Worker started for {kinds} with concurrency {args.concurrency}")
+
+    while not stop.wait(1):
+        pass
+
+    for thread in threads[1:]:
+        thread.join()
+
+if __name__ == "__main__":
+    main()